@@ -0,0 +1,121 @@
+﻿# -*- coding: utf-8 -*-
+"""ASGI entry point: ``uvicorn asgi:application --workers 4``.
+
+Endpoints in ``ASYNC_ENDPOINTS`` (``GET /api/etf/<ticker>``) run on the event
+loop with the async fetch layer, so an on-demand upstream call parks a
+coroutine instead of a worker thread.
+Every other route is handed to the Flask app through asgiref's WSGI adapter.
+"""
+import asyncio
+import io
+import os
+import sys
+
+os.environ.setdefault('FINANCE_DEBUG', '0')
+
+from asgiref.wsgi import WsgiToAsgi
+from werkzeug.exceptions import HTTPException
+from finance_web import (
+    DEBUG,
+    app,
+    close_async_provider_clients,
+    etf_timeseries_async,
+    start_background_refresh,
+    warm_up,
+)
+
+ASYNC_ENDPOINTS = {
+    'etf_timeseries': etf_timeseries_async,
+}
+
+app.debug = DEBUG
+_wsgi_application = WsgiToAsgi(app)
+_url_adapter = app.url_map.bind('localhost')
+
+
+def _environ(scope):
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'],
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        key = name.decode('latin-1').upper().replace('-', '_')
+        if key not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            key = f'HTTP_{key}'
+        value = value.decode('latin-1')
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+def _match_async_endpoint(scope):
+    try:
+        endpoint, arguments = _url_adapter.match(scope['path'], method=scope['method'])
+    except HTTPException:
+        return None, None
+    return ASYNC_ENDPOINTS.get(endpoint), arguments
+
+
+async def _dispatch_async(scope, send, view, arguments):
+    # Mirrors Flask.wsgi_app/full_dispatch_request, so before/after hooks and
+    # registered error handlers apply to async views too.
+    with app.request_context(_environ(scope)):
+        try:
+            try:
+                rv = app.preprocess_request()
+                if rv is None:
+                    rv = await view(**arguments)
+            except Exception as exc:
+                rv = app.handle_user_exception(exc)
+            response = app.finalize_request(rv)
+        except Exception as exc:
+            response = app.handle_exception(exc)
+    await send({
+        'type': 'http.response.start',
+        'status': response.status_code,
+        'headers': [
+            (name.lower().encode('latin-1'), value.encode('latin-1'))
+            for name, value in response.headers.items()
+        ],
+    })
+    await send({
+        'type': 'http.response.body',
+        'body': b'' if scope['method'] == 'HEAD' else response.get_data(),
+    })
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await asyncio.to_thread(warm_up)
+            start_background_refresh()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await close_async_provider_clients()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await _lifespan(receive, send)
+
+    if scope['type'] == 'http' and scope['method'] in ('GET', 'HEAD'):
+        view, arguments = _match_async_endpoint(scope)
+        if view is not None:
+            return await _dispatch_async(scope, send, view, arguments)
+
+    await _wsgi_application(scope, receive, send)
@@ -0,0 +1,137 @@
+const pageType = document.body.dataset.page || 'home';
+const dataRequests = {};
+
+const fetchData = url => {
+    if (!dataRequests[url]) {
+        dataRequests[url] = fetch(url).then(response => {
+            if (!response.ok) {
+                throw new Error(`${response.status} ${url}`);
+            }
+            return response.json();
+        });
+        dataRequests[url].catch(() => {
+            delete dataRequests[url];
+        });
+    }
+    return dataRequests[url];
+};
+
+if (pageType === "home") {
+    const filterButtons = document.querySelectorAll('.filter-button');
+    const cards = document.querySelectorAll('.card');
+
+    filterButtons.forEach(button => {
+        button.addEventListener('click', () => {
+            const category = button.dataset.filter;
+
+            filterButtons.forEach(btn => btn.classList.remove('active'));
+            button.classList.add('active');
+
+            cards.forEach(card => {
+                const match = category === 'all' || card.dataset.category === category;
+                card.style.display = match ? 'grid' : 'none';
+            });
+        });
+    });
+
+    const cardOverlay = document.getElementById('cardOverlay');
+    const cardOverlayTitle = document.getElementById('cardOverlayTitle');
+    const cardOverlayOverview = document.getElementById('cardOverlayOverview');
+    const cardOverlayClose = document.getElementById('cardOverlayClose');
+    const cardOverlayCancel = document.getElementById('cardOverlayCancel');
+    const cardOverlayGo = document.getElementById('cardOverlayGo');
+
+    const hideCardOverlay = () => {
+        if (cardOverlay) {
+            cardOverlay.classList.remove('active');
+        }
+    };
+
+    cards.forEach(card => {
+        card.addEventListener('click', event => {
+            if (event.target.closest('.card-link')) {
+                return;
+            }
+            const slug = card.dataset.slug;
+
+            if (!cardOverlay || !cardOverlayTitle || !cardOverlayOverview || !cardOverlayGo) {
+                window.location.href = `/card/${slug}`;
+                return;
+            }
+
+            fetchData(`/api/cards/${slug}`).then(data => {
+                const overviewZh = data.overview_zh || data.insight_zh || '';
+                const overviewEn = data.overview_en || data.insight_en || '';
+
+                cardOverlayTitle.innerHTML = `${data.title_zh}<span class="en">${data.title_en}</span>`;
+                cardOverlayOverview.innerHTML = `${overviewZh}<span class="en">${overviewEn}</span>`;
+                cardOverlayGo.href = data.detail_url || `/card/${slug}`;
+                cardOverlay.classList.add('active');
+            }).catch(() => {
+                window.location.href = `/card/${slug}`;
+            });
+        });
+    });
+
+    if (cardOverlayClose) {
+        cardOverlayClose.addEventListener('click', hideCardOverlay);
+    }
+    if (cardOverlayCancel) {
+        cardOverlayCancel.addEventListener('click', event => {
+            event.preventDefault();
+            hideCardOverlay();
+        });
+    }
+    if (cardOverlay) {
+        cardOverlay.addEventListener('click', event => {
+            if (event.target === cardOverlay) {
+                hideCardOverlay();
+            }
+        });
+    }
+    document.addEventListener('keydown', event => {
+        if (event.key === 'Escape' && cardOverlay && cardOverlay.classList.contains('active')) {
+            hideCardOverlay();
+        }
+    });
+
+    const modelOverlay = document.getElementById('modelOverlay');
+    const modelCards = document.querySelectorAll('.model-card');
+    const modelDetailTitle = document.getElementById('modelDetailTitle');
+    const modelDetailDescription = document.getElementById('modelDetailDescription');
+    const modelDetailHighlights = document.getElementById('modelDetailHighlights');
+    const closeModelDetail = document.getElementById('closeModelDetail');
+
+    modelCards.forEach(card => {
+        card.addEventListener('click', () => {
+            const modelId = card.dataset.model;
+
+            fetchData(`/api/models/${modelId}`).then(model => {
+                modelDetailTitle.innerHTML = `${model.title_zh}<span class="en">${model.title_en}</span>`;
+                modelDetailDescription.innerHTML = `${model.description_zh}<span class="en">${model.description_en}</span>`;
+                modelDetailHighlights.innerHTML = '';
+                model.highlights.forEach(point => {
+                    const li = document.createElement('li');
+                    li.innerHTML = `${point.zh}<span class="en">${point.en}</span>`;
+                    modelDetailHighlights.appendChild(li);
+                });
+
+                modelOverlay.classList.add('active');
+            }).catch(() => {});
+        });
+    });
+
+    if (closeModelDetail) {
+        closeModelDetail.addEventListener('click', () => {
+            modelOverlay.classList.remove('active');
+        });
+    }
+
+    if (modelOverlay) {
+        modelOverlay.addEventListener('click', event => {
+            if (event.target === modelOverlay) {
+                modelOverlay.classList.remove('active');
+            }
+        });
+    }
+}
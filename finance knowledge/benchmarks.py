@@ -0,0 +1,210 @@
+﻿# -*- coding: utf-8 -*-
+"""Micro-benchmarks for the finance knowledge app.
+
+Run ``python benchmarks.py [name ...]``; with no names every benchmark runs.
+"""
+from pathlib import Path
+import argparse
+import math
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+
+HERE = Path(__file__).resolve().parent
+LEGACY_EXCEL_PATH = HERE / 'data' / 'etf_monthly.xlsx'
+
+
+def _report(label: str, seconds: float, number: int = 1):
+    print(f'  {label:<40} {seconds / number * 1000:10.3f} ms')
+
+
+def _cold_start(code: str, repeat: int = 3):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], cwd=HERE, check=True)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_store(number: int = 20):
+    from etf_store import ExcelStore, NpyStore
+
+    excel = ExcelStore(LEGACY_EXCEL_PATH)
+    cache = excel.load()
+    print(f'store ({len(cache)} tickers, {sum(map(len, cache.values()))} rows)')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        npy = NpyStore(Path(tmp) / 'etf_npy')
+        npy.save(cache)
+        ticker = next(iter(cache))
+
+        _report('cold start: excel import + load', _cold_start(
+            f'from etf_store import ExcelStore; ExcelStore({str(excel.path)!r}).load()'
+        ))
+        _report('cold start: npy import + load', _cold_start(
+            f'from etf_store import NpyStore; NpyStore({str(npy.path)!r}).load()'
+        ))
+        _report('excel load', timeit.timeit(excel.load, number=number), number)
+        _report('npy load', timeit.timeit(npy.load, number=number), number)
+        _report('npy load_array (mmap, one ticker)', timeit.timeit(
+            lambda: npy.load_array(ticker), number=number), number)
+
+        scratch = ExcelStore(Path(tmp) / 'scratch.xlsx')
+        _report('excel save', timeit.timeit(lambda: scratch.save(cache), number=number), number)
+        _report('npy save', timeit.timeit(lambda: npy.save(cache), number=number), number)
+
+
+def _allocated(build):
+    tracemalloc.start()
+    try:
+        result = build()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, current
+
+
+def bench_series(number: int = 2000):
+    from etf_series import EtfSeries
+    from etf_store import ExcelStore
+
+    cache = ExcelStore(LEGACY_EXCEL_PATH).load()
+    points = {ticker: list(series) for ticker, series in cache.items()}
+    ticker = next(iter(cache))
+    print(f'series ({len(cache)} tickers, {sum(map(len, cache.values()))} rows)')
+
+    legacy, legacy_bytes = _allocated(lambda: {
+        ticker: [dict(point) for point in series] for ticker, series in points.items()
+    })
+    compact, compact_bytes = _allocated(lambda: {
+        ticker: EtfSeries.from_points(series) for ticker, series in points.items()
+    })
+    print(f'  {"memory: list of dicts":<40} {legacy_bytes / 1024:10.1f} KiB')
+    print(f'  {"memory: EtfSeries":<40} {compact_bytes / 1024:10.1f} KiB')
+
+    def legacy_payload():
+        series = legacy[ticker]
+        return {
+            'dates': [point['date'] for point in series],
+            'navs': [point['nav'] for point in series],
+            'returns': [point['return_pct'] for point in series],
+        }
+
+    _report('payload: list of dicts', timeit.timeit(legacy_payload, number=number), number)
+    _report('payload: EtfSeries.to_api', timeit.timeit(compact[ticker].to_api, number=number), number)
+
+
+def bench_render(number: int = 50):
+    import finance_web
+    from finance_content import CARD_DETAILS, CARDS, ETF_CARDS, ETFS, MODELS, TEMPLATES
+    from flask import render_template
+
+    app = finance_web.app
+    env = app.jinja_env
+    samples = [
+        ('home', {}),
+        ('card_detail', {
+            'card_detail': CARD_DETAILS[CARDS[0]['slug']],
+            'related_cards': CARDS[1:4],
+        }),
+        ('model_detail', {'model_detail': MODELS[0], 'related_models': MODELS[1:4]}),
+        ('etf-detail', {'card': ETF_CARDS[0], 'matched_etfs': ETFS, 'primary_etf': ETFS[0]}),
+    ]
+
+    print('render')
+    with app.test_request_context('/'):
+        for page_type, extra in samples:
+            template = finance_web.PAGE_TEMPLATES[page_type]
+            context = finance_web._page_context(page_type, **extra)
+
+            def compile_per_request():
+                env.cache.clear()
+                return render_template(env.from_string(TEMPLATES[template.name]), **context)
+
+            _report(f'{page_type}: compile per request', timeit.timeit(
+                compile_per_request, number=number), number)
+            _report(f'{page_type}: precompiled', timeit.timeit(
+                lambda: render_template(template, **context), number=number), number)
+
+        finance_web.warm_page_cache()
+        _report('home: page cache', timeit.timeit(finance_web.index, number=number), number)
+
+
+def _scalar_call(spot, strike, expiry, vol, rate):
+    root_t = math.sqrt(expiry)
+    d1 = (math.log(spot / strike) + (rate + 0.5 * vol * vol) * expiry) / (vol * root_t)
+    d2 = d1 - vol * root_t
+    cdf = lambda x: 0.5 * math.erfc(-x / math.sqrt(2))
+    price = spot * cdf(d1) - strike * math.exp(-rate * expiry) * cdf(d2)
+    vega = spot * math.exp(-0.5 * d1 * d1) / math.sqrt(2 * math.pi) * root_t
+    return price, vega
+
+
+def _scalar_implied_vol(price, spot, strike, expiry, rate, tolerance=1e-10):
+    low, high, vol = 1e-6, 5.0, 0.3
+    for _ in range(100):
+        model, vega = _scalar_call(spot, strike, expiry, vol, rate)
+        error = model - price
+        if abs(error) <= tolerance * max(1.0, price):
+            return vol
+        if error > 0:
+            high = vol
+        else:
+            low = vol
+        step = vol - error / vega if vega > 0 else low
+        vol = step if low < step < high else 0.5 * (low + high)
+    return vol
+
+
+def bench_options(quotes: int = 10_000, number: int = 5):
+    import numpy as np
+    import black_scholes
+
+    rng = np.random.default_rng(0)
+    spot = rng.uniform(80, 120, quotes)
+    strike = rng.uniform(80, 120, quotes)
+    expiry = rng.uniform(0.05, 2.0, quotes)
+    vol = rng.uniform(0.1, 0.6, quotes)
+    rate = 0.02
+    prices = black_scholes.black_scholes(spot, strike, expiry, vol, rate)['price']
+    contracts = list(zip(spot.tolist(), strike.tolist(), expiry.tolist(), vol.tolist()))
+    quoted = list(zip(prices.tolist(), spot.tolist(), strike.tolist(), expiry.tolist()))
+    print(f'options ({quotes} quotes)')
+
+    _report('price: scalar loop', timeit.timeit(
+        lambda: [_scalar_call(s, k, t, v, rate) for s, k, t, v in contracts],
+        number=number), number)
+    _report('price + greeks: vectorized', timeit.timeit(
+        lambda: black_scholes.black_scholes(spot, strike, expiry, vol, rate), number=number), number)
+    _report('implied vol: scalar loop', timeit.timeit(
+        lambda: [_scalar_implied_vol(p, s, k, t, rate) for p, s, k, t in quoted], number=number), number)
+    _report('implied vol: vectorized', timeit.timeit(
+        lambda: black_scholes.implied_volatility(prices, spot, strike, expiry, rate), number=number), number)
+
+
+BENCHMARKS = {
+    'options': bench_options,
+    'render': bench_render,
+    'series': bench_series,
+    'store': bench_store,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run finance knowledge micro-benchmarks.')
+    parser.add_argument('names', nargs='*', metavar='name', help=f'one of: {", ".join(sorted(BENCHMARKS))}')
+    args = parser.parse_args(argv)
+    unknown = sorted(set(args.names) - set(BENCHMARKS))
+    if unknown:
+        parser.error(f'unknown benchmark(s): {", ".join(unknown)}')
+    for name in args.names or sorted(BENCHMARKS):
+        BENCHMARKS[name]()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+﻿# -*- coding: utf-8 -*-
+"""Vectorized Black-Scholes pricing, Greeks and implied volatility.
+
+Every function broadcasts its arguments with numpy, so a whole option grid
+or a batch of quotes is priced in one call. Rates, dividend yields and
+volatilities are annualized and continuously compounded; expiries are in
+years. Vega and rho are per 1.00 change, theta is per year.
+"""
+import numpy as np
+
+try:
+    from scipy.special import ndtr as _ndtr
+except ImportError:
+    _ndtr = None
+
+IV_LOWER_BOUND = 1e-6
+IV_UPPER_BOUND = 5.0
+IV_TOLERANCE = 1e-10
+IV_MAX_ITERATIONS = 100
+GREEKS = ('price', 'delta', 'gamma', 'vega', 'theta', 'rho')
+
+_SQRT_2PI = np.sqrt(2 * np.pi)
+
+
+def norm_pdf(x):
+    return np.exp(-0.5 * np.square(x)) / _SQRT_2PI
+
+
+def _hart_cdf(x):
+    # Hart (1968) rational approximation, accurate to double precision.
+    x = np.asarray(x, dtype=np.float64)
+    z = np.abs(x)
+    exponential = np.exp(-0.5 * z * z)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        numerator = (((((0.0352624965998911 * z + 0.700383064443688) * z + 6.37396220353165) * z
+                       + 33.912866078383) * z + 112.079291497871) * z + 221.213596169931) * z + 220.206867912376
+        denominator = ((((((0.0883883476483184 * z + 1.75566716318264) * z + 16.064177579207) * z
+                          + 86.7807322029461) * z + 296.564248779674) * z + 637.333633378831) * z
+                       + 793.826512519948) * z + 440.413735824752
+        fraction = z + 1 / (z + 2 / (z + 3 / (z + 4 / (z + 0.65))))
+        tail = np.where(z < 7.07106781186547, exponential * numerator / denominator,
+                        exponential / fraction / _SQRT_2PI)
+    tail = np.where(z > 37, 0.0, tail)
+    return np.where(x > 0, 1 - tail, tail)
+
+
+def norm_cdf(x):
+    if _ndtr is not None:
+        return _ndtr(x)
+    return _hart_cdf(x)
+
+
+def _option_sign(is_call):
+    return np.where(np.asarray(is_call, dtype=bool), 1.0, -1.0)
+
+
+def black_scholes(spot, strike, expiry, vol, rate=0.0, dividend=0.0, is_call=True):
+    """Price and Greeks for broadcast arrays of European options, as a dict of arrays."""
+    spot, strike, expiry, vol, rate, dividend = np.broadcast_arrays(
+        *(np.asarray(value, dtype=np.float64) for value in (spot, strike, expiry, vol, rate, dividend))
+    )
+    sign = _option_sign(is_call)
+    root_t = np.sqrt(expiry)
+    vol_root_t = vol * root_t
+    d1 = (np.log(spot / strike) + (rate - dividend + 0.5 * vol * vol) * expiry) / vol_root_t
+    d2 = d1 - vol_root_t
+
+    spot_discount = spot * np.exp(-dividend * expiry)
+    strike_discount = strike * np.exp(-rate * expiry)
+    cdf1 = norm_cdf(sign * d1)
+    cdf2 = norm_cdf(sign * d2)
+    density = norm_pdf(d1)
+    return {
+        'price': sign * (spot_discount * cdf1 - strike_discount * cdf2),
+        'delta': sign * np.exp(-dividend * expiry) * cdf1,
+        'gamma': np.exp(-dividend * expiry) * density / (spot * vol_root_t),
+        'vega': spot_discount * density * root_t,
+        'theta': (-spot_discount * density * vol / (2 * root_t)
+                  - sign * rate * strike_discount * cdf2
+                  + sign * dividend * spot_discount * cdf1),
+        'rho': sign * strike_discount * expiry * cdf2,
+    }
+
+
+def price_grid(spot, strike, expiry, vol, rate=0.0, dividend=0.0, is_call=True):
+    """Price the outer product spot x strike x expiry x vol; arrays have that 4-D shape."""
+    axes = np.ix_(*(np.atleast_1d(np.asarray(axis, dtype=np.float64)) for axis in (spot, strike, expiry, vol)))
+    return black_scholes(*axes, rate=rate, dividend=dividend, is_call=is_call)
+
+
+def _price_and_vega(spot, strike, expiry, vol, rate, dividend, sign):
+    root_t = np.sqrt(expiry)
+    vol_root_t = vol * root_t
+    d1 = (np.log(spot / strike) + (rate - dividend + 0.5 * vol * vol) * expiry) / vol_root_t
+    spot_discount = spot * np.exp(-dividend * expiry)
+    strike_discount = strike * np.exp(-rate * expiry)
+    price = sign * (spot_discount * norm_cdf(sign * d1) - strike_discount * norm_cdf(sign * (d1 - vol_root_t)))
+    return price, spot_discount * norm_pdf(d1) * root_t
+
+
+def implied_volatility(price, spot, strike, expiry, rate=0.0, dividend=0.0, is_call=True,
+                       tolerance=IV_TOLERANCE, max_iterations=IV_MAX_ITERATIONS):
+    """Invert option prices to volatilities with a bracketed, vectorized Newton solver.
+
+    Each quote keeps its own ``[low, high]`` bracket. A Newton step that leaves
+    the bracket, or has no usable vega, falls back to bisection, so every quote
+    inside the no-arbitrage bounds converges. Quotes outside those bounds,
+    or priced above ``IV_UPPER_BOUND`` volatility, get NaN rather than the
+    bracket edge. Returns ``(volatility, iterations)``.
+    """
+    arrays = np.broadcast_arrays(price, spot, strike, expiry, rate, dividend, _option_sign(is_call))
+    shape = arrays[0].shape
+    price, spot, strike, expiry, rate, dividend, sign = (
+        np.array(value, dtype=np.float64).ravel() for value in arrays
+    )
+    spot_discount = spot * np.exp(-dividend * expiry)
+    strike_discount = strike * np.exp(-rate * expiry)
+    intrinsic = np.maximum(sign * (spot_discount - strike_discount), 0.0)
+    upper = np.where(sign > 0, spot_discount, strike_discount)
+
+    result = np.full(price.shape, np.nan)
+    active = np.flatnonzero((price > intrinsic) & (price < upper) & (expiry > 0))
+    ceiling, _ = _price_and_vega(
+        spot[active], strike[active], expiry[active], IV_UPPER_BOUND, rate[active], dividend[active], sign[active]
+    )
+    active = active[price[active] < ceiling]
+    low = np.full(active.shape, IV_LOWER_BOUND)
+    high = np.full(active.shape, IV_UPPER_BOUND)
+    # Manaster-Koehler start: the volatility where vega peaks.
+    moneyness = np.abs(np.log(spot_discount[active] / strike_discount[active]))
+    vol = np.clip(np.sqrt(2 * moneyness / expiry[active]), 0.05, 1.0)
+
+    iterations = 0
+    while active.size and iterations < max_iterations:
+        iterations += 1
+        model, vega = _price_and_vega(
+            spot[active], strike[active], expiry[active], vol, rate[active], dividend[active], sign[active]
+        )
+        error = model - price[active]
+        done = np.abs(error) <= tolerance * np.maximum(1.0, price[active])
+        result[active[done]] = vol[done]
+
+        keep = ~done
+        active, vol, error, vega, low, high = (
+            array[keep] for array in (active, vol, error, vega, low, high)
+        )
+        high = np.where(error > 0, vol, high)
+        low = np.where(error > 0, low, vol)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = vol - error / vega
+        bisect = ~np.isfinite(step) | (step <= low) | (step >= high)
+        vol = np.where(bisect, 0.5 * (low + high), step)
+
+        narrow = high - low <= tolerance
+        result[active[narrow]] = vol[narrow]
+        keep = ~narrow
+        active, vol, low, high = (array[keep] for array in (active, vol, low, high))
+
+    return result.reshape(shape), iterations
@@ -0,0 +1,165 @@
+﻿# -*- coding: utf-8 -*-
+"""Vectorized analytics over cached ETF nav series."""
+from functools import reduce
+from statistics import NormalDist
+import math
+import warnings
+
+import numpy as np
+
+TRADING_DAYS = 252
+VAR_CONFIDENCES = (0.95, 0.99)
+VAR_CHUNK_CELLS = 2_000_000
+
+
+def nav_matrix(series_list):
+    """Stack nav arrays into a left-aligned, NaN-padded 2-D matrix."""
+    width = max((len(series) for series in series_list), default=0)
+    matrix = np.full((len(series_list), width), np.nan)
+    for row, series in enumerate(series_list):
+        matrix[row, :len(series)] = series.navs
+    return matrix
+
+
+def aligned_log_returns(cache, tickers):
+    """Daily log returns on the dates every ticker has, as ``(days, matrix)``."""
+    days = reduce(np.intersect1d, (cache[ticker].days for ticker in tickers))
+    navs = np.column_stack([
+        cache[ticker].navs[np.searchsorted(cache[ticker].days, days)]
+        for ticker in tickers
+    ])
+    return days[1:], np.diff(np.log(navs), axis=0)
+
+
+def performance_stats(navs, risk_free_rate=0.0, periods=TRADING_DAYS):
+    navs = np.atleast_2d(np.asarray(navs, dtype=np.float64))
+    rows = np.arange(len(navs))
+    with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        returns = navs[:, 1:] / navs[:, :-1] - 1
+        valid = ~np.isnan(returns)
+        count = valid.sum(axis=1)
+
+        total_return = navs[rows, count] / navs[:, 0] - 1
+        annualized_return = (1 + total_return) ** (periods / count) - 1
+        mean_return = np.nanmean(returns, axis=1)
+        volatility = np.nanstd(returns, axis=1, ddof=1) * np.sqrt(periods)
+        excess_return = mean_return * periods - risk_free_rate
+
+        shortfall = np.where(valid, np.minimum(returns - risk_free_rate / periods, 0.0), np.nan)
+        downside_deviation = np.sqrt(np.nanmean(shortfall ** 2, axis=1)) * np.sqrt(periods)
+
+        peaks = np.fmax.accumulate(navs, axis=1)
+        max_drawdown = np.nanmin(navs / peaks - 1, axis=1)
+
+        return {
+            'observations': count,
+            'total_return': total_return,
+            'annualized_return': annualized_return,
+            'annualized_volatility': volatility,
+            'max_drawdown': max_drawdown,
+            'sharpe': excess_return / volatility,
+            'sortino': excess_return / downside_deviation,
+            'hit_rate': (returns > 0).sum(axis=1) / count,
+        }
+
+
+def capm_regression(asset_returns, market_returns, window=None, risk_free_rate=0.0, periods=TRADING_DAYS):
+    """CAPM beta, annualized Jensen alpha and R² of an asset against the market.
+
+    With ``window`` the statistics are computed for every trailing window of
+    that many returns. They come from differences of cumulative sums, so the
+    cost is O(n) however many windows there are. Without it there is a single
+    full-sample value. Inputs are centred first to keep the sums well
+    conditioned.
+    """
+    excess = risk_free_rate / periods
+    y = np.asarray(asset_returns, dtype=np.float64) - excess
+    x = np.asarray(market_returns, dtype=np.float64) - excess
+    window = window or len(x)
+    x_mean, y_mean = x.mean(), y.mean()
+    xc, yc = x - x_mean, y - y_mean
+
+    sums = np.cumsum(np.column_stack([xc, yc, xc * xc, yc * yc, xc * yc]), axis=0)
+    sums = np.vstack([np.zeros((1, 5)), sums])
+    mx, my, mxx, myy, mxy = ((sums[window:] - sums[:-window]) / window).T
+    var_x = mxx - mx * mx
+    var_y = myy - my * my
+    cov = mxy - mx * my
+    with np.errstate(divide='ignore', invalid='ignore'):
+        beta = cov / var_x
+        r_squared = cov * cov / (var_x * var_y)
+    alpha = ((my + y_mean) - beta * (mx + x_mean)) * periods
+    return {'beta': beta, 'alpha': alpha, 'r_squared': r_squared}
+
+
+class ReturnsModel:
+    """Aligned asset returns over a fixed horizon, plus the moments VaR needs.
+
+    ``returns`` holds overlapping ``horizon``-day simple returns per asset.
+    ``log_mean`` and ``log_cov`` are the daily log-return moments scaled to
+    the horizon.
+    """
+    __slots__ = ('tickers', 'days', 'horizon', 'returns', 'mean', 'cov', 'log_mean', 'log_cov')
+
+    def __init__(self, tickers, days, log_returns, horizon=1):
+        log_returns = np.asarray(log_returns, dtype=np.float64)
+        cumulative = np.vstack([np.zeros((1, log_returns.shape[1])), np.cumsum(log_returns, axis=0)])
+        self.tickers = list(tickers)
+        self.days = days
+        self.horizon = horizon
+        self.returns = np.expm1(cumulative[horizon:] - cumulative[:-horizon])
+        self.mean = self.returns.mean(axis=0)
+        self.cov = np.atleast_2d(np.cov(self.returns, rowvar=False))
+        self.log_mean = log_returns.mean(axis=0) * horizon
+        self.log_cov = np.atleast_2d(np.cov(log_returns, rowvar=False)) * horizon
+
+
+def historical_var(portfolio_returns, confidences=VAR_CONFIDENCES):
+    """Empirical VaR and CVaR (as positive losses) of each row; arrays are ``(confidence, row)``."""
+    losses = -np.atleast_2d(portfolio_returns)
+    count = losses.shape[1]
+    tails = [max(1, math.ceil((1 - confidence) * count - 1e-9)) for confidence in confidences]
+    ranked = np.partition(losses, sorted({count - tail for tail in tails}), axis=1)
+    var = np.stack([ranked[:, count - tail] for tail in tails])
+    cvar = np.stack([ranked[:, count - tail:].mean(axis=1) for tail in tails])
+    return var, cvar
+
+
+def parametric_var(mean, cov, weights, confidences=VAR_CONFIDENCES):
+    """Variance-covariance VaR and CVaR for each weight row, assuming normal returns."""
+    weights = np.atleast_2d(weights)
+    mu = weights @ mean
+    sigma = np.sqrt(np.maximum(np.einsum('pi,ij,pj->p', weights, cov, weights), 0.0))
+    normal = NormalDist()
+    z = np.array([normal.inv_cdf(confidence) for confidence in confidences])[:, None]
+    density = np.array([normal.pdf(value) for value in z.ravel()])[:, None]
+    tail = 1 - np.asarray(confidences)[:, None]
+    return z * sigma - mu, density / tail * sigma - mu
+
+
+def portfolio_var(model, weights, confidences=VAR_CONFIDENCES, paths=10_000, seed=0):
+    """Historical, parametric and Monte Carlo VaR/CVaR for a batch of portfolios.
+
+    ``weights`` has one row per portfolio and one column per ``model.tickers``
+    entry. The Monte Carlo method draws one set of joint-normal log-return
+    scenarios and revalues every portfolio against it. Returns
+    ``{method: (var, cvar)}`` with ``(confidence, portfolio)`` arrays.
+    """
+    weights = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+    rng = np.random.default_rng(seed)
+    scenarios = np.expm1(rng.multivariate_normal(
+        model.log_mean, model.log_cov, size=paths, method='eigh', check_valid='ignore'
+    ))
+
+    results = {
+        'historical': historical_var(weights @ model.returns.T, confidences),
+        'parametric': parametric_var(model.mean, model.cov, weights, confidences),
+    }
+    chunk = max(1, VAR_CHUNK_CELLS // paths)
+    simulated = [
+        historical_var(weights[start:start + chunk] @ scenarios.T, confidences)
+        for start in range(0, len(weights), chunk)
+    ]
+    results['monte_carlo'] = tuple(np.hstack(parts) for parts in zip(*simulated))
+    return results
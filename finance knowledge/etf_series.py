@@ -0,0 +1,132 @@
+﻿# -*- coding: utf-8 -*-
+"""Compact array-backed ETF time series."""
+from datetime import date
+
+import numpy as np
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+class EtfSeries:
+    """Parallel day/nav/return arrays for one ETF.
+
+    ``days`` holds ``date.toordinal()`` values as int32; their ISO strings are
+    built once, on first use. Slicing returns a new
+    series of views over the same buffers, and iterating yields the legacy
+    ``{'date', 'nav', 'return_pct'}`` dicts for callers that still want them.
+    """
+
+    __slots__ = ('days', 'navs', 'returns', '_dates')
+
+    def __init__(self, days, navs, returns):
+        self.days = days
+        self.navs = navs
+        self.returns = returns
+        self._dates = None
+
+    @classmethod
+    def empty(cls):
+        return cls(
+            np.empty(0, dtype=np.int32),
+            np.empty(0, dtype=np.float64),
+            np.empty(0, dtype=np.float64),
+        )
+
+    @classmethod
+    def from_navs(cls, days, navs):
+        days = np.asarray(days, dtype=np.int32)
+        navs = np.round(np.asarray(navs, dtype=np.float64), 4)
+        if not len(navs):
+            return cls.empty()
+        base = navs[0] or 1.0
+        returns = np.round((navs / base - 1) * 100, 2)
+        return cls(days, navs, returns)
+
+    @classmethod
+    def from_rows(cls, rows):
+        return cls.from_navs(rows['day'], rows['nav'])
+
+    @classmethod
+    def from_points(cls, points):
+        days = [date.fromisoformat(str(point['date'])[:10]).toordinal() for point in points]
+        navs = [point['nav'] for point in points]
+        returns = [point['return_pct'] for point in points]
+        return cls(
+            np.asarray(days, dtype=np.int32),
+            np.round(np.asarray(navs, dtype=np.float64), 4),
+            np.round(np.asarray(returns, dtype=np.float64), 2),
+        )
+
+    def __len__(self):
+        return len(self.days)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return EtfSeries(self.days[index], self.navs[index], self.returns[index])
+        return {
+            'date': date.fromordinal(int(self.days[index])).isoformat(),
+            'nav': float(self.navs[index]),
+            'return_pct': float(self.returns[index]),
+        }
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __eq__(self, other):
+        if not isinstance(other, EtfSeries):
+            return NotImplemented
+        return (
+            np.array_equal(self.days, other.days)
+            and np.array_equal(self.navs, other.navs)
+            and np.array_equal(self.returns, other.returns)
+        )
+
+    def __repr__(self):
+        if not len(self):
+            return 'EtfSeries([])'
+        return f'EtfSeries({len(self)} points, {self[0]["date"]}..{self[-1]["date"]})'
+
+    def date_strings(self):
+        if self._dates is None:
+            stamps = (self.days.astype(np.int64) - EPOCH_ORDINAL).astype('datetime64[D]')
+            self._dates = np.datetime_as_string(stamps).tolist()
+        return list(self._dates)
+
+    def merge(self, other):
+        """Union by date with ``other``; this series wins on shared dates, as in the store.
+
+        ``other`` may also be a list of point dicts, as the providers return.
+        """
+        if not isinstance(other, EtfSeries):
+            other = EtfSeries.from_points(other)
+        if not len(other):
+            return self
+        if not len(self) or other.days[0] > self.days[-1]:
+            fresh = slice(None)
+        else:
+            fresh = ~np.isin(other.days, self.days)
+            if not fresh.any():
+                return self
+        days = np.concatenate([self.days, other.days[fresh]])
+        navs = np.concatenate([self.navs, other.navs[fresh]])
+        order = np.argsort(days, kind='stable')
+        return EtfSeries.from_navs(days[order], navs[order])
+
+    def tail(self, count):
+        """The last ``count`` points, with returns rebased to the first of them."""
+        if len(self) <= count:
+            return EtfSeries.from_navs(self.days, self.navs)
+        return EtfSeries.from_navs(self.days[-count:], self.navs[-count:])
+
+    def last_date(self):
+        if not len(self):
+            return None
+        return date.fromordinal(int(self.days[-1])).isoformat()
+
+    def to_api(self):
+        return {
+            'dates': self.date_strings(),
+            'navs': self.navs.tolist(),
+            'returns': self.returns.tolist(),
+        }
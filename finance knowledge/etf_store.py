@@ -0,0 +1,516 @@
+﻿# -*- coding: utf-8 -*-
+"""Persistence backends for the cached ETF history."""
+from pathlib import Path
+from datetime import date, datetime
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+from etf_series import EtfSeries
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+SERIES_DTYPE = np.dtype([
+    ('day', '<i4'),
+    ('nav', '<f8'),
+    ('return_pct', '<f8'),
+])
+COMPACT_MIN_LOG_ROWS = 250
+SHARED_MAGIC = b'ETFSHM01'
+_SHARED_HEADER = struct.Struct('<8sQdQ')
+_GENERATION = struct.Struct('<Q')
+
+
+def _temp_path(path: Path) -> Path:
+    return path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+
+
+def _date_to_ordinal(value):
+    if isinstance(value, datetime):
+        return value.date().toordinal()
+    if isinstance(value, date):
+        return value.toordinal()
+    try:
+        return date.fromisoformat(str(value)[:10]).toordinal()
+    except ValueError:
+        return None
+
+
+def _touch(path: Path, timestamp):
+    if timestamp:
+        os.utime(path, (timestamp, timestamp))
+
+
+class FileLock:
+    def __init__(self, path):
+        self.path = path
+        self._handle = None
+
+    def acquire(self, blocking=True):
+        handle = open(self.path, 'a+b')
+        try:
+            if fcntl is not None:
+                flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+                fcntl.flock(handle.fileno(), flags)
+            else:
+                handle.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+                        break
+                    except OSError:
+                        if not blocking:
+                            raise
+                        time.sleep(0.2)
+        except OSError:
+            handle.close()
+            return False
+        self._handle = handle
+        return True
+
+    def release(self):
+        handle, self._handle = self._handle, None
+        if handle is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            handle.close()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+def series_to_array(series):
+    if isinstance(series, EtfSeries):
+        rows = np.empty(len(series), dtype=SERIES_DTYPE)
+        rows['day'] = series.days
+        rows['nav'] = series.navs
+        rows['return_pct'] = series.returns
+        return dedupe_rows(rows)
+
+    rows = []
+    for point in series:
+        day = _date_to_ordinal(point['date'])
+        if day is None:
+            continue
+        rows.append((day, point['nav'], point['return_pct']))
+    return dedupe_rows(np.array(rows, dtype=SERIES_DTYPE))
+
+
+def dedupe_rows(rows):
+    if not len(rows):
+        return rows
+    _, first = np.unique(rows['day'], return_index=True)
+    return rows[first]
+
+
+class NpyStore:
+    """Append-only per-ticker history in NumPy files.
+
+    Each ETF has a compacted ``<ticker>.npy`` base plus a ``<ticker>.log`` of
+    raw rows appended since the last compaction. Rows are unique by date and
+    the first value written for a date wins. Appends only read the base
+    header and the short log, so a refresh costs O(new rows). The writer
+    folds a log into its base once it reaches ``compact_min_log_rows``. The
+    JSON manifest is replaced last, so its mtime marks the latest completed
+    refresh.
+    """
+
+    name = 'npy'
+    default_name = 'etf_npy'
+
+    def __init__(self, path, compact_min_log_rows=COMPACT_MIN_LOG_ROWS):
+        self.path = Path(path)
+        self.manifest_path = self.path / 'manifest.json'
+        self.lock_path = self.path / '.lock'
+        self.compact_min_log_rows = compact_min_log_rows
+
+    def exists(self):
+        return self.manifest_path.exists()
+
+    def mtime(self):
+        try:
+            return self.manifest_path.stat().st_mtime
+        except OSError:
+            return 0
+
+    def tickers(self):
+        try:
+            manifest = json.loads(self.manifest_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return []
+        return list(manifest.get('tickers') or [])
+
+    def _series_path(self, ticker: str) -> Path:
+        return self.path / f'{ticker.upper()}.npy'
+
+    def _log_path(self, ticker: str) -> Path:
+        return self.path / f'{ticker.upper()}.log'
+
+    def _lock(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        return FileLock(self.lock_path)
+
+    def _write_manifest(self, tickers, generated_at=None):
+        manifest = {
+            'generated_at': datetime.utcnow().isoformat(timespec='seconds'),
+            'tickers': sorted(tickers),
+        }
+        tmp_path = _temp_path(self.manifest_path)
+        tmp_path.write_text(json.dumps(manifest), encoding='utf-8')
+        _touch(tmp_path, generated_at)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _write_base(self, ticker: str, rows):
+        path = self._series_path(ticker)
+        tmp_path = _temp_path(path)
+        with open(tmp_path, 'wb') as handle:
+            np.save(handle, rows, allow_pickle=False)
+        os.replace(tmp_path, path)
+
+    def _read_log(self, ticker: str):
+        try:
+            return np.fromfile(self._log_path(ticker), dtype=SERIES_DTYPE)
+        except (OSError, ValueError):
+            return np.empty(0, dtype=SERIES_DTYPE)
+
+    def _base_last_day(self, ticker: str):
+        try:
+            with open(self._series_path(ticker), 'rb') as handle:
+                version = np.lib.format.read_magic(handle)
+                if version == (1, 0):
+                    shape, _, _ = np.lib.format.read_array_header_1_0(handle)
+                else:
+                    shape, _, _ = np.lib.format.read_array_header_2_0(handle)
+                if not shape or not shape[0]:
+                    return -1
+                handle.seek(-SERIES_DTYPE.itemsize, os.SEEK_END)
+                row = np.frombuffer(handle.read(SERIES_DTYPE.itemsize), dtype=SERIES_DTYPE)
+        except (OSError, ValueError):
+            return -1
+        return int(row['day'][0])
+
+    def load_array(self, ticker: str, mmap=True):
+        path = self._series_path(ticker)
+        try:
+            return np.load(path, mmap_mode='r' if mmap else None, allow_pickle=False)
+        except (OSError, ValueError):
+            return None
+
+    def load_rows(self, ticker: str, mmap=False):
+        base = self.load_array(ticker, mmap=mmap)
+        if base is None:
+            base = np.empty(0, dtype=SERIES_DTYPE)
+        log = self._read_log(ticker)
+        if not len(log):
+            return base
+        return dedupe_rows(np.concatenate([base, log]))
+
+    def load_ticker(self, ticker: str):
+        return EtfSeries.from_rows(self.load_rows(ticker))
+
+    def load(self):
+        cache = {}
+        for ticker in self.tickers():
+            series = self.load_ticker(ticker)
+            if series:
+                cache[ticker] = series
+        return cache
+
+    def append(self, cache, refreshed=True):
+        with self._lock():
+            known = set(self.tickers())
+            tickers = set(known)
+            for ticker, series in cache.items():
+                ticker = ticker.upper()
+                rows = series_to_array(series)
+                log = self._read_log(ticker)
+                last_day = max(self._base_last_day(ticker), int(log['day'].max(initial=-1)))
+                if len(rows) and rows['day'][0] <= last_day:
+                    # Only a backfill needs the full date index; a delta is all past the tail.
+                    existing = self.load_rows(ticker)
+                    rows = rows[~np.isin(rows['day'], existing['day'])]
+                if len(rows):
+                    with open(self._log_path(ticker), 'ab') as handle:
+                        handle.write(rows.tobytes())
+                    if len(log) + len(rows) >= self.compact_min_log_rows:
+                        self._compact_ticker(ticker)
+                if len(rows) or last_day >= 0:
+                    tickers.add(ticker)
+            if refreshed:
+                self._write_manifest(tickers)
+            elif tickers != known:
+                self._write_manifest(tickers, generated_at=self.mtime())
+
+    def save(self, cache, generated_at=None):
+        with self._lock():
+            tickers = []
+            for ticker, series in cache.items():
+                rows = series_to_array(series)
+                if not len(rows):
+                    continue
+                self._write_base(ticker, rows)
+                self._log_path(ticker).unlink(missing_ok=True)
+                tickers.append(ticker.upper())
+            self._write_manifest(tickers, generated_at=generated_at)
+
+    def _compact_ticker(self, ticker: str):
+        self._write_base(ticker, self.load_rows(ticker))
+        self._log_path(ticker).unlink(missing_ok=True)
+
+    def compact(self, min_log_rows=None):
+        if min_log_rows is None:
+            min_log_rows = self.compact_min_log_rows
+        compacted = 0
+        with self._lock():
+            for ticker in self.tickers():
+                try:
+                    log_rows = self._log_path(ticker).stat().st_size // SERIES_DTYPE.itemsize
+                except OSError:
+                    continue
+                if log_rows < min_log_rows:
+                    continue
+                self._compact_ticker(ticker)
+                compacted += 1
+        return compacted
+
+
+class ExcelStore:
+    """The legacy ``etf_monthly.xlsx`` workbook, kept for exports."""
+
+    name = 'excel'
+    default_name = 'etf_monthly.xlsx'
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def exists(self):
+        return self.path.exists()
+
+    def mtime(self):
+        try:
+            return self.path.stat().st_mtime
+        except OSError:
+            return 0
+
+    def load(self):
+        from openpyxl import load_workbook
+
+        if not self.path.exists():
+            return {}
+
+        try:
+            wb = load_workbook(self.path, read_only=True, data_only=True)
+        except Exception:
+            return {}
+
+        if 'etf_history' not in wb.sheetnames:
+            return {}
+
+        sheet = wb['etf_history']
+        cache = {}
+        for ticker, date_value, nav_value, return_value in sheet.iter_rows(min_row=2, values_only=True):
+            if not ticker or not date_value:
+                continue
+            if isinstance(date_value, datetime):
+                date_str = date_value.strftime('%Y-%m-%d')
+            else:
+                date_str = str(date_value)
+            try:
+                nav = float(nav_value)
+            except (TypeError, ValueError):
+                continue
+            try:
+                pct = float(return_value)
+            except (TypeError, ValueError):
+                pct = 0.0
+            cache.setdefault(str(ticker).upper(), []).append({
+                'date': date_str,
+                'nav': round(nav, 4),
+                'return_pct': round(pct, 2),
+            })
+
+        for series in cache.values():
+            series.sort(key=lambda item: item['date'])
+        return {ticker: EtfSeries.from_points(series) for ticker, series in cache.items()}
+
+    def load_ticker(self, ticker: str):
+        return self.load().get(ticker.upper()) or EtfSeries.empty()
+
+    def append(self, cache, refreshed=True):
+        merged = self.load()
+        for ticker, series in cache.items():
+            by_date = {point['date']: point for point in series}
+            by_date.update((point['date'], point) for point in merged.get(ticker.upper(), []))
+            merged[ticker.upper()] = [by_date[key] for key in sorted(by_date)]
+        self.save(merged, generated_at=None if refreshed else self.mtime())
+
+    def compact(self, min_log_rows=COMPACT_MIN_LOG_ROWS):
+        return 0
+
+    def save(self, cache, generated_at=None):
+        from openpyxl import Workbook
+
+        wb = Workbook()
+        ws = wb.active
+        ws.title = 'etf_history'
+        ws.append(['ticker', 'date', 'nav', 'return_pct'])
+        for ticker, series in cache.items():
+            for point in series:
+                ws.append([
+                    ticker,
+                    point['date'],
+                    point['nav'],
+                    point['return_pct'],
+                ])
+
+        meta = wb.create_sheet('meta')
+        meta.append(['generated_at', datetime.utcnow().isoformat(timespec='seconds')])
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = _temp_path(self.path)
+        wb.save(tmp_path)
+        _touch(tmp_path, generated_at)
+        os.replace(tmp_path, self.path)
+
+
+class SharedSnapshot:
+    __slots__ = ('generation', 'mtime', 'cache', 'fallback')
+
+    def __init__(self, generation, mtime, cache, fallback=frozenset()):
+        self.generation = generation
+        self.mtime = mtime
+        self.cache = cache
+        self.fallback = fallback
+
+
+class SharedSeriesCache:
+    """One memory-mapped snapshot of every series, shared across processes.
+
+    ``publish`` writes ``header | JSON index | rows`` to ``<name>.<gen>.bin``
+    and then bumps the 8-byte counter in ``<name>.gen`` in place. Readers keep
+    the counter mapped, so polling for a new generation is a memory read, and
+    the series they load are views into the mapped rows. The index also
+    lists the tickers whose series are stand-in exchange closes rather than
+    NAVs, so every process treats them the same way.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.generation_path = self.path.with_name(f'{self.path.name}.gen')
+        self.lock_path = self.path.with_name(f'{self.path.name}.lock')
+        self._counter = None
+
+    def _data_path(self, generation: int) -> Path:
+        return self.path.with_name(f'{self.path.name}.{generation}.bin')
+
+    def generation(self):
+        if self._counter is None:
+            try:
+                with open(self.generation_path, 'rb') as handle:
+                    self._counter = mmap.mmap(handle.fileno(), _GENERATION.size, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                return 0
+        return _GENERATION.unpack_from(self._counter)[0]
+
+    def load(self, generation=None):
+        generation = generation or self.generation()
+        if not generation:
+            return None
+        try:
+            with open(self._data_path(generation), 'rb') as handle:
+                buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        magic, stored_generation, mtime, index_size = _SHARED_HEADER.unpack_from(buffer)
+        if magic != SHARED_MAGIC:
+            return None
+        offset = _SHARED_HEADER.size + index_size
+        index = json.loads(buffer[_SHARED_HEADER.size:offset])
+        cache = {}
+        if index['tickers']:
+            rows = np.frombuffer(buffer, dtype=SERIES_DTYPE, offset=offset)
+            for ticker, (start, stop) in index['tickers'].items():
+                cache[ticker] = EtfSeries(rows['day'][start:stop], rows['nav'][start:stop], rows['return_pct'][start:stop])
+        return SharedSnapshot(stored_generation, mtime, cache, frozenset(index.get('fallback', ())))
+
+    def _write(self, path: Path, generation: int, cache, mtime, fallback):
+        tickers = {}
+        blocks = []
+        offset = 0
+        for ticker, series in sorted(cache.items()):
+            rows = series_to_array(series)
+            if not len(rows):
+                continue
+            tickers[ticker.upper()] = [offset, offset + len(rows)]
+            blocks.append(rows)
+            offset += len(rows)
+        index = json.dumps({
+            'tickers': tickers,
+            'fallback': sorted(ticker.upper() for ticker in fallback if ticker.upper() in tickers),
+        }).encode('utf-8')
+        index += b' ' * (-(_SHARED_HEADER.size + len(index)) % 8)
+        tmp_path = _temp_path(path)
+        with open(tmp_path, 'wb') as handle:
+            handle.write(_SHARED_HEADER.pack(SHARED_MAGIC, generation, mtime, len(index)))
+            handle.write(index)
+            for rows in blocks:
+                handle.write(rows.tobytes())
+        os.replace(tmp_path, path)
+
+    def _remove_stale(self, generation: int):
+        for path in self.path.parent.glob(f'{self.path.name}.*.bin'):
+            try:
+                stale = int(path.name[len(self.path.name) + 1:-len('.bin')]) < generation - 1
+            except ValueError:
+                continue
+            if stale:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def publish(self, cache, mtime, fallback=()):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with FileLock(self.lock_path):
+            fd = os.open(self.generation_path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0))
+            try:
+                if os.fstat(fd).st_size < _GENERATION.size:
+                    os.ftruncate(fd, _GENERATION.size)
+                with mmap.mmap(fd, _GENERATION.size) as counter:
+                    generation = _GENERATION.unpack_from(counter)[0] + 1
+                    self._write(self._data_path(generation), generation, cache, mtime, fallback)
+                    _GENERATION.pack_into(counter, 0, generation)
+            finally:
+                os.close(fd)
+            self._remove_stale(generation)
+        return self.load(generation)
+
+
+STORE_BACKENDS = {
+    NpyStore.name: NpyStore,
+    ExcelStore.name: ExcelStore,
+}
+
+
+def open_store(backend: str, data_dir):
+    try:
+        store_cls = STORE_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f'Unknown ETF store backend: {backend!r}') from None
+    return store_cls(Path(data_dir) / store_cls.default_name)
@@ -758,1039 +758,13 @@ ETF_CARDS = [
     },
 ]
 
-TEMPLATE = """<!DOCTYPE html>
+TEMPLATE_BASE = """<!DOCTYPE html>
 <html lang=\"zh-CN\">
 <head>
     <meta charset=\"UTF-8\">
     <meta name=\"viewport\" content=\"width=device-width, initial-scale=1.0\">
     <title>金融小知识卡片 · Finance Knowledge Cards</title>
-    <style>
-        :root {
-            --accent: #0c7cd5;
-            --accent-soft: rgba(12, 124, 213, 0.12);
-            --text-dark: #1f2933;
-            --text-light: #3e4c59;
-            --bg: #f7fafc;
-        }
-
-        * {
-            box-sizing: border-box;
-        }
-
-        body {
-            margin: 0;
-            font-family: 'Segoe UI', 'Helvetica Neue', Arial, sans-serif;
-            background: white;
-            color: var(--text-dark);
-            line-height: 1.6;
-        }
-
-        a {
-            color: inherit;
-        }
-
-        header {
-            border-bottom: 1px solid #e4ebf3;
-            background: white;
-        }
-
-        .top-bar {
-            max-width: 1100px;
-            margin: 0 auto;
-            padding: 18px 24px;
-            display: flex;
-            align-items: center;
-            justify-content: space-between;
-        }
-
-        .brand {
-            display: flex;
-            align-items: center;
-            gap: 12px;
-            font-weight: 600;
-            font-size: 20px;
-            letter-spacing: 0.5px;
-            text-transform: capitalize;
-        }
-
-        .brand-icon {
-            width: 36px;
-            height: 36px;
-            border-radius: 10px;
-            background: var(--accent-soft);
-            display: grid;
-            place-items: center;
-            color: var(--accent);
-            font-weight: 700;
-        }
-
-        nav {
-            display: flex;
-            gap: 22px;
-            font-size: 15px;
-            color: var(--text-light);
-        }
-
-        .cta {
-            padding: 10px 18px;
-            border-radius: 999px;
-            background: var(--accent);
-            color: white;
-            border: none;
-            font-size: 14px;
-            cursor: pointer;
-            transition: transform 0.2s ease, box-shadow 0.2s ease;
-        }
-
-        .cta:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 10px 18px rgba(12, 124, 213, 0.2);
-        }
-
-        .hero {
-            max-width: 1100px;
-            margin: 0 auto;
-            padding: 64px 24px 48px;
-            display: grid;
-            gap: 24px;
-        }
-
-        .hero h1 {
-            margin: 0;
-            font-size: clamp(32px, 5vw, 46px);
-            line-height: 1.2;
-        }
-
-        .hero .headline-en {
-            margin-top: 8px;
-            font-size: 20px;
-            color: #52606d;
-            letter-spacing: 0.5px;
-        }
-
-        .hero p {
-            max-width: 680px;
-            margin: 0;
-            color: var(--text-light);
-            font-size: 17px;
-        }
-
-        .hero .para-en {
-            font-size: 15px;
-            color: #7b8794;
-            margin-top: 6px;
-        }
-
-        .filter-bar {
-            display: flex;
-            flex-wrap: wrap;
-            gap: 12px;
-            background: var(--bg);
-            padding: 12px;
-            border-radius: 12px;
-            align-items: center;
-        }
-
-        .filter-title {
-            font-weight: 600;
-            font-size: 14px;
-            text-transform: uppercase;
-            letter-spacing: 1.2px;
-            color: var(--text-light);
-        }
-
-        .filter-button {
-            padding: 9px 16px;
-            border-radius: 999px;
-            background: white;
-            border: 1px solid #d9e2ec;
-            cursor: pointer;
-            font-size: 13px;
-            color: var(--text-light);
-            transition: all 0.2s ease;
-        }
-
-        .filter-button span {
-            display: block;
-            line-height: 1.1;
-        }
-
-        .filter-button span.en {
-            font-size: 11px;
-            color: #8292a6;
-        }
-
-        .filter-button.active,
-        .filter-button:hover {
-            background: var(--accent);
-            color: white;
-            border-color: var(--accent);
-        }
-
-        .cards-section {
-            max-width: 1100px;
-            margin: 0 auto;
-            padding: 0 24px 64px;
-        }
-
-        .section-heading {
-            font-size: 28px;
-            margin: 0;
-        }
-
-        .section-heading .en {
-            display: block;
-            margin-top: 6px;
-            font-size: 16px;
-            color: #8292a6;
-            letter-spacing: 0.5px;
-        }
-
-        .card-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(260px, 1fr));
-            gap: 24px;
-            margin-top: 28px;
-        }
-
-        .card {
-            background: white;
-            border: 1px solid #e4ebf3;
-            border-radius: 18px;
-            padding: 24px;
-            display: grid;
-            cursor: pointer;
-            gap: 14px;
-            box-shadow: 0 12px 24px rgba(15, 23, 42, 0.06);
-            transition: transform 0.2s ease, box-shadow 0.2s ease;
-        }
-
-        .card:hover {
-            transform: translateY(-4px);
-            box-shadow: 0 18px 30px rgba(15, 23, 42, 0.12);
-        }
-
-        .card-tag {
-            display: inline-flex;
-            flex-direction: column;
-            align-items: flex-start;
-            gap: 2px;
-            padding: 6px 12px;
-            background: var(--accent-soft);
-            color: var(--accent);
-            font-size: 12px;
-            font-weight: 600;
-            border-radius: 999px;
-            text-transform: uppercase;
-            letter-spacing: 1px;
-        }
-
-        .card-tag .en {
-            font-size: 11px;
-            color: var(--accent);
-            opacity: 0.8;
-        }
-
-        .card h3 {
-            margin: 0;
-            font-size: 20px;
-        }
-
-        .card .title-en {
-            margin: 0;
-            font-size: 15px;
-            color: #8292a6;
-        }
-
-        .card ul {
-            margin: 0;
-            padding-left: 18px;
-            color: var(--text-light);
-            font-size: 14px;
-            display: grid;
-            gap: 10px;
-        }
-
-        .card li .en {
-            display: block;
-            color: #8292a6;
-            font-size: 12px;
-            margin-top: 4px;
-        }
-
-        .insight {
-            margin: 0;
-            font-size: 14px;
-            color: #52606d;
-        }
-
-        .insight .en {
-            display: block;
-            color: #9aa5b1;
-            font-size: 12px;
-            margin-top: 4px;
-        }
-
-        .card-actions {
-            margin-top: auto;
-        }
-
-        .card-link {
-            display: inline-flex;
-            align-items: center;
-            gap: 6px;
-            padding: 10px 16px;
-            background: var(--accent-soft);
-            color: var(--accent);
-            border-radius: 999px;
-            font-size: 14px;
-            font-weight: 600;
-            text-decoration: none;
-            transition: background 0.2s ease, transform 0.2s ease;
-        }
-
-        .card-link .en {
-            font-weight: 500;
-            color: var(--text-light);
-        }
-
-        .card-link:hover {
-            background: rgba(12, 124, 213, 0.2);
-            transform: translateY(-1px);
-        }
-
-        .models-section {
-            background: var(--bg);
-            padding: 72px 24px;
-        }
-
-        .models-inner {
-            max-width: 1100px;
-            margin: 0 auto;
-            display: grid;
-            gap: 32px;
-        }
-
-        .models-header h2 {
-            margin: 0;
-            font-size: 30px;
-        }
-
-        .models-header .en {
-            display: block;
-            margin-top: 6px;
-            font-size: 17px;
-            color: #8292a6;
-        }
-
-        .models-header p {
-            margin: 12px 0 0;
-            color: var(--text-light);
-            max-width: 640px;
-        }
-
-        .models-header p .en {
-            display: block;
-            margin-top: 4px;
-            color: #9aa5b1;
-            font-size: 13px;
-        }
-
-        .model-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(240px, 1fr));
-            gap: 20px;
-        }
-
-        .model-card {
-            display: grid;
-            gap: 12px;
-            padding: 22px;
-            border-radius: 18px;
-            border: 1px solid #d9e2ec;
-            background: white;
-            text-align: left;
-            cursor: pointer;
-            transition: transform 0.2s ease, box-shadow 0.2s ease, border-color 0.2s ease;
-        }
-
-        .model-card:hover {
-            transform: translateY(-4px);
-            border-color: var(--accent);
-            box-shadow: 0 16px 28px rgba(15, 23, 42, 0.12);
-        }
-
-        .model-card h3 {
-            margin: 0;
-            font-size: 19px;
-        }
-
-        .model-card .title-en {
-            font-size: 14px;
-            color: #8292a6;
-        }
-
-        .model-card p {
-            margin: 0;
-            color: var(--text-light);
-            font-size: 14px;
-        }
-
-        .model-card p .en {
-            display: block;
-            color: #9aa5b1;
-            font-size: 12px;
-            margin-top: 2px;
-        }
-
-        .model-badge {
-            display: inline-flex;
-            align-items: center;
-            gap: 6px;
-            font-size: 12px;
-            font-weight: 600;
-            letter-spacing: 1px;
-            text-transform: uppercase;
-            color: var(--accent);
-            background: var(--accent-soft);
-            border-radius: 999px;
-            padding: 6px 10px;
-        }
-
-        .model-more {
-            font-size: 13px;
-            color: var(--accent);
-            font-weight: 600;
-        }
-
-                .etf-summary-section {
-            background: white;
-            padding: 72px 24px;
-        }
-
-        .etf-summary-inner {
-            max-width: 1100px;
-            margin: 0 auto;
-            display: grid;
-            gap: 28px;
-        }
-
-        .etf-summary-header h2 {
-            margin: 0;
-            font-size: 28px;
-            letter-spacing: 0.5px;
-        }
-
-        .etf-summary-header .en {
-            margin-left: 8px;
-            font-size: 18px;
-            color: var(--text-light);
-        }
-
-        .etf-summary-header p {
-            margin: 12px 0 0;
-            color: var(--text-light);
-            max-width: 720px;
-            font-size: 15px;
-        }
-
-        .etf-summary-header p .en {
-            display: inline;
-        }
-
-        .etf-card-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(240px, 1fr));
-            gap: 20px;
-        }
-
-        .etf-mini-card {
-            background: #f0f7ff;
-            border: 1px solid #d2e3f8;
-            border-radius: 18px;
-            padding: 24px;
-            display: grid;
-            gap: 14px;
-            text-align: left;
-            cursor: pointer;
-            transition: transform 0.2s ease, box-shadow 0.2s ease, border-color 0.2s ease;
-        }
-
-        .etf-mini-card:hover {
-            transform: translateY(-4px);
-            border-color: var(--accent);
-            box-shadow: 0 16px 28px rgba(12, 124, 213, 0.18);
-        }
-
-        .etf-mini-card h3 {
-            margin: 0;
-            font-size: 20px;
-        }
-
-        .etf-mini-card h3 .en {
-            display: block;
-            margin-top: 4px;
-            font-size: 14px;
-            color: #4d5d6c;
-        }
-
-        .etf-mini-card p {
-            margin: 0;
-            color: var(--text-light);
-            font-size: 14px;
-        }
-
-        .etf-mini-card p .en {
-            display: block;
-            margin-top: 4px;
-            color: #9aa5b1;
-            font-size: 12px;
-        }
-
-        .etf-mini-card .meta {
-            display: flex;
-            gap: 16px;
-            font-size: 13px;
-            color: #4f5d75;
-        }
-
-        .etf-mini-card .meta strong {
-            font-size: 18px;
-            color: var(--accent);
-        }
-
-        .etf-mini-card .meta .en {
-            display: block;
-            font-size: 11px;
-            color: #8292a6;
-        }
-
-        .etf-overlay {
-            position: fixed;
-            inset: 0;
-            background: rgba(15, 23, 42, 0.5);
-            display: none;
-            align-items: center;
-            justify-content: center;
-            padding: 32px;
-            z-index: 15;
-        }
-
-        .etf-overlay.active {
-            display: flex;
-        }
-
-        .etf-detail {
-            background: white;
-            border-radius: 22px;
-            max-width: 1000px;
-            width: 100%;
-            padding: 32px;
-            display: grid;
-            gap: 24px;
-            box-shadow: 0 32px 56px rgba(15, 23, 42, 0.35);
-            position: relative;
-        }
-
-        .etf-detail-header h3 {
-            margin: 0;
-            font-size: 24px;
-        }
-
-        .etf-detail-header h3 .en {
-            display: block;
-            margin-top: 6px;
-            font-size: 15px;
-            color: #8292a6;
-        }
-
-        .etf-detail-header p {
-            margin: 8px 0 0;
-            color: var(--text-light);
-            font-size: 14px;
-        }
-
-        .etf-detail-layout {
-            display: grid;
-            grid-template-columns: 320px 1fr;
-            gap: 24px;
-        }
-
-        .etf-search {
-            position: relative;
-        }
-
-        .etf-search input {
-            width: 100%;
-            padding: 10px 14px;
-            border-radius: 12px;
-            border: 1px solid #d9e2ec;
-            font-size: 14px;
-        }
-
-        .etf-list {
-            list-style: none;
-            margin: 16px 0 0;
-            padding: 0;
-            border: 1px solid #e4ebf3;
-            border-radius: 16px;
-            max-height: 420px;
-            overflow: auto;
-        }
-
-        .etf-list-item {
-            display: grid;
-            gap: 6px;
-            padding: 14px 16px;
-            border-bottom: 1px solid #e4ebf3;
-            cursor: pointer;
-            background: white;
-            transition: background 0.2s ease;
-        }
-
-        .etf-list-item:last-child {
-            border-bottom: none;
-        }
-
-        .etf-list-item:hover,
-        .etf-list-item.active {
-            background: rgba(12, 124, 213, 0.08);
-        }
-
-        .etf-list-item strong {
-            font-size: 15px;
-        }
-
-        .etf-list-item .ticker {
-            font-size: 12px;
-            color: var(--accent);
-            text-transform: uppercase;
-        }
-
-        .etf-list-item .stats {
-            display: flex;
-            gap: 12px;
-            font-size: 12px;
-            color: #4f5d75;
-        }
-
-        .etf-chart-panel {
-            background: #f8fbff;
-            border-radius: 18px;
-            padding: 20px;
-            border: 1px solid #d9e2ec;
-            display: grid;
-            gap: 18px;
-            min-height: 460px;
-        }
-
-        .etf-chart-panel canvas {
-            width: 100%;
-            max-height: 320px;
-        }
-
-        .etf-chart-empty {
-            display: grid;
-            place-items: center;
-            color: #9aa5b1;
-            font-size: 13px;
-            height: 320px;
-        }
-
-        .etf-chart-meta {
-            display: grid;
-            gap: 10px;
-            font-size: 13px;
-            color: #4f5d75;
-        }
-
-        .etf-chart-meta .row {
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-        }
-
-        .etf-chart-meta .label {
-            font-weight: 600;
-            color: var(--text-dark);
-        }
-
-        .etf-chart-meta .value {
-            font-variant-numeric: tabular-nums;
-        }
-
-        .etf-close {
-            position: absolute;
-            top: 18px;
-            right: 18px;
-            background: none;
-            border: none;
-            font-size: 26px;
-            cursor: pointer;
-            color: #708090;
-        }
-
-        @media (max-width: 960px) {
-            .etf-detail-layout {
-                grid-template-columns: 1fr;
-            }
-
-            .etf-chart-panel {
-                min-height: 360px;
-            }
-        }
-
-        @media (max-width: 640px) {
-            .etf-summary-section {
-                padding: 48px 16px;
-            }
-
-            .etf-card-grid {
-                grid-template-columns: 1fr;
-            }
-
-            .etf-detail {
-                padding: 22px;
-            }
-
-            .etf-overlay {
-                padding: 16px;
-            }
-        }
-        .model-overlay {
-            position: fixed;
-            inset: 0;
-            background: rgba(15, 23, 42, 0.45);
-            display: none;
-            align-items: center;
-            justify-content: center;
-            padding: 24px;
-            z-index: 10;
-        }
-
-        .model-overlay.active {
-            display: flex;
-        }
-
-        .model-detail {
-            background: white;
-            border-radius: 20px;
-            max-width: 560px;
-            width: 100%;
-            padding: 32px;
-            display: grid;
-            gap: 18px;
-            position: relative;
-            box-shadow: 0 28px 48px rgba(15, 23, 42, 0.28);
-        }
-
-        .model-detail h3 {
-            margin: 0;
-        }
-
-        .model-detail h3 .en {
-            display: block;
-            color: #8292a6;
-            font-size: 15px;
-            margin-top: 4px;
-        }
-
-        .model-detail p {
-            margin: 0;
-            color: var(--text-light);
-        }
-
-        .model-detail p .en {
-            display: block;
-            color: #9aa5b1;
-            font-size: 13px;
-            margin-top: 4px;
-        }
-
-        .model-detail ul {
-            margin: 0;
-            padding-left: 18px;
-            color: var(--text-light);
-            font-size: 14px;
-            display: grid;
-            gap: 10px;
-        }
-
-        .model-detail li .en {
-            display: block;
-            color: #9aa5b1;
-            font-size: 12px;
-            margin-top: 4px;
-        }
-
-        .close-detail {
-            position: absolute;
-            top: 16px;
-            right: 16px;
-            background: none;
-            border: none;
-            font-size: 24px;
-            cursor: pointer;
-            color: #8292a6;
-        }
-
-        .card-overlay {
-            position: fixed;
-            inset: 0;
-            background: rgba(15, 23, 42, 0.55);
-            display: none;
-            align-items: center;
-            justify-content: center;
-            padding: 24px;
-            z-index: 12;
-        }
-
-        .card-overlay.active {
-            display: flex;
-        }
-
-        .card-overlay-panel {
-            background: white;
-            border-radius: 18px;
-            max-width: 520px;
-            width: 100%;
-            padding: 28px;
-            display: grid;
-            gap: 18px;
-            position: relative;
-            box-shadow: 0 24px 48px rgba(15, 23, 42, 0.3);
-        }
-
-        .card-overlay-panel h3 {
-            margin: 0;
-        }
-
-        .card-overlay-panel h3 .en {
-            display: block;
-            color: #8292a6;
-            font-size: 14px;
-            margin-top: 4px;
-        }
-
-        .card-overlay-panel p {
-            margin: 0;
-            color: var(--text-light);
-            font-size: 15px;
-        }
-
-        .card-overlay-panel p .en {
-            display: block;
-            color: #9aa5b1;
-            font-size: 13px;
-            margin-top: 6px;
-        }
-
-        .card-overlay-actions {
-            display: flex;
-            flex-wrap: wrap;
-            gap: 12px;
-            justify-content: flex-end;
-            margin-top: 8px;
-        }
-
-        .card-overlay-actions .ghost {
-            background: transparent;
-            border: 1px solid #d5dee9;
-            color: var(--text-light);
-            padding: 10px 18px;
-            border-radius: 999px;
-            cursor: pointer;
-        }
-
-        .card-overlay-actions .primary {
-            background: var(--accent);
-            color: white;
-            padding: 10px 20px;
-            border-radius: 999px;
-            text-decoration: none;
-            display: inline-flex;
-            align-items: center;
-            gap: 8px;
-            font-weight: 600;
-        }
-
-        .card-overlay-close {
-            position: absolute;
-            top: 16px;
-            right: 16px;
-            background: none;
-            border: none;
-            font-size: 24px;
-            cursor: pointer;
-            color: #8a99ac;
-        }
-
-        .card-detail-page {
-            max-width: 1100px;
-            margin: 0 auto;
-            padding: 72px 24px 80px;
-            display: grid;
-            gap: 32px;
-        }
-
-        .card-detail-header {
-            display: grid;
-            gap: 12px;
-        }
-
-        .card-detail-header .card-tag {
-            display: inline-flex;
-            align-items: center;
-            gap: 8px;
-            font-size: 14px;
-            color: var(--accent);
-            background: var(--accent-soft);
-            padding: 6px 12px;
-            border-radius: 999px;
-            width: fit-content;
-        }
-
-        .card-detail-header h1 {
-            margin: 0;
-            font-size: clamp(32px, 5vw, 40px);
-            line-height: 1.2;
-        }
-
-        .card-detail-header h1 .en {
-            display: block;
-            color: #8292a6;
-            font-size: 16px;
-            margin-top: 6px;
-        }
-
-        .card-detail-overview {
-            font-size: 17px;
-            color: var(--text-light);
-        }
-
-        .card-detail-overview .en {
-            display: block;
-            color: #9aa5b1;
-            font-size: 14px;
-            margin-top: 6px;
-        }
-
-        .card-detail-body {
-            display: grid;
-            gap: 28px;
-        }
-
-        .card-detail-section h2 {
-            margin: 0 0 12px;
-            font-size: 20px;
-        }
-
-        .card-detail-section h2 .en {
-            display: block;
-            color: #8292a6;
-            font-size: 14px;
-            margin-top: 4px;
-        }
-
-        .card-detail-section ul {
-            margin: 0;
-            padding-left: 20px;
-            display: grid;
-            gap: 12px;
-            color: var(--text-light);
-        }
-
-        .card-detail-section li .en {
-            display: block;
-            color: #9aa5b1;
-            font-size: 13px;
-            margin-top: 4px;
-        }
-
-        .card-detail-related {
-            border-top: 1px solid #e4ebf3;
-            padding-top: 32px;
-            display: grid;
-            gap: 16px;
-        }
-
-        .card-detail-related-grid {
-            display: grid;
-            gap: 16px;
-            grid-template-columns: repeat(auto-fit, minmax(240px, 1fr));
-        }
-
-        .card-detail-related a {
-            border: 1px solid #e4ebf3;
-            border-radius: 14px;
-            padding: 18px;
-            text-decoration: none;
-            color: inherit;
-            background: white;
-            transition: border-color 0.2s ease, box-shadow 0.2s ease;
-        }
-
-        .card-detail-related a:hover {
-            border-color: var(--accent);
-            box-shadow: 0 12px 24px rgba(12, 124, 213, 0.12);
-        }
-
-        @media (max-width: 640px) {
-            .card-overlay-panel {
-                padding: 22px;
-            }
-
-            .card-detail-page {
-                padding: 56px 16px 64px;
-            }
-        }
-
-        footer {
-            padding: 24px;
-            background: white;
-            border-top: 1px solid #e4ebf3;
-            color: var(--text-light);
-            font-size: 13px;
-        }
-
-        footer .footer-content {
-            max-width: 1100px;
-            margin: 0 auto;
-            display: flex;
-            flex-wrap: wrap;
-            gap: 12px;
-            justify-content: space-between;
-            align-items: center;
-        }
-
-        footer ul {
-            display: flex;
-            gap: 16px;
-            margin: 0;
-            padding: 0;
-            list-style: none;
-        }
-
-        footer ul li span.en {
-            display: block;
-            font-size: 11px;
-            color: #9aa5b1;
-        }
-
-        @media (max-width: 640px) {
-            nav {
-                display: none;
-            }
-
-            .top-bar {
-                padding: 16px;
-            }
-
-            .model-grid {
-                grid-template-columns: 1fr;
-            }
-        }
-    </style>
+    <link rel="stylesheet" href="{{ assets['site.css'] }}">
 </head>
 <body data-page="{{ page_type }}">
     <header>
@@ -1817,7 +791,25 @@ TEMPLATE = """<!DOCTYPE html>
         </div>
     </header>
 
-    {% if page_type == 'home' %}
+{% block content %}{% endblock %}
+
+    <footer id='footer'>
+        <div class='footer-content'>
+            <span>© 2025 yjc · 以知识赋能投资者 / Empowering investors through knowledge.</span>
+            <ul>
+                <li><a href='#'>使用条款<span class='en'>Terms</span></a></li>
+                <li><a href='#'>隐私政策<span class='en'>Privacy</span></a></li>
+                <li><a href='#'>联系我们<span class='en'>Contact</span></a></li>
+            </ul>
+        </div>
+    </footer>
+
+{% block scripts %}{% endblock %}
+</body>
+</html>"""
+
+TEMPLATE_HOME = """{% extends 'base.html' %}
+{% block content %}
     <section class='hero'>
         <div>
             <h1>轻松掌握金融常识，双语速读核心要点</h1>
@@ -1951,7 +943,13 @@ TEMPLATE = """<!DOCTYPE html>
             <ul id='modelDetailHighlights'></ul>
         </div>
     </div>
-    {% elif page_type == 'card_detail' %}
+{% endblock %}
+{% block scripts %}
+    <script src="{{ assets['home.js'] }}" defer></script>
+{% endblock %}"""
+
+TEMPLATE_CARD_DETAIL = """{% extends 'base.html' %}
+{% block content %}
     <main class='card-detail-page'>
         <div class='card-detail-header'>
             <span class='card-tag'>
@@ -1998,7 +996,10 @@ TEMPLATE = """<!DOCTYPE html>
         </div>
         {% endif %}
     </main>
-{% elif page_type == 'etf-detail' %}
+{% endblock %}"""
+
+TEMPLATE_ETF_DETAIL = """{% extends 'base.html' %}
+{% block content %}
     <section class='detail-hero'>
         <div class='detail-hero-text'>
             <h1>{{ card.title_zh }}<span class='headline-en'>{{ card.title_en }}</span></h1>
@@ -2076,163 +1077,30 @@ TEMPLATE = """<!DOCTYPE html>
     <section class='related-section'>
         <div class='related-inner'>
             <h2>更多 yjc 内容<span class='en'>More from yjc</span></h2>
-            <div class='related-grid'>
-                <a class='related-card' href='/#cards'>
-                    <h3>知识卡片推荐<span class='en'>Knowledge Cards</span></h3>
-                    <p>浏览更多投资与理财知识卡片，扩展你的金融视野。</p>
-                </a>
-                <a class='related-card' href='/#models'>
-                    <h3>模型亮点<span class='en'>Model Spotlights</span></h3>
-                    <p>深入了解估值、风险与资产配置模型的核心公式与实操要点。</p>
-                </a>
-                <a class='related-card' href='/#etfs'>
-                    <h3>返回 ETF 导航<span class='en'>Back to ETF Discovery</span></h3>
-                    <p>回到 ETF 专区，筛选不同风格与市场的基金机会。</p>
-                </a>
-            </div>
+            <div class='related-grid'>
+                <a class='related-card' href='/#cards'>
+                    <h3>知识卡片推荐<span class='en'>Knowledge Cards</span></h3>
+                    <p>浏览更多投资与理财知识卡片，扩展你的金融视野。</p>
+                </a>
+                <a class='related-card' href='/#models'>
+                    <h3>模型亮点<span class='en'>Model Spotlights</span></h3>
+                    <p>深入了解估值、风险与资产配置模型的核心公式与实操要点。</p>
+                </a>
+                <a class='related-card' href='/#etfs'>
+                    <h3>返回 ETF 导航<span class='en'>Back to ETF Discovery</span></h3>
+                    <p>回到 ETF 专区，筛选不同风格与市场的基金机会。</p>
+                </a>
+            </div>
         </div>
     </section>
-    {% endif %}
+{% endblock %}"""
 
-    <footer id='footer'>
-        <div class='footer-content'>
-            <span>© 2025 yjc · 以知识赋能投资者 / Empowering investors through knowledge.</span>
-            <ul>
-                <li><a href='#'>使用条款<span class='en'>Terms</span></a></li>
-                <li><a href='#'>隐私政策<span class='en'>Privacy</span></a></li>
-                <li><a href='#'>联系我们<span class='en'>Contact</span></a></li>
-            </ul>
-        </div>
-    </footer>
-
-    <script>
-        const pageType = document.body.dataset.page || 'home';
-
-        if (pageType === "home") {
-            const filterButtons = document.querySelectorAll('.filter-button');
-            const cards = document.querySelectorAll('.card');
-
-            filterButtons.forEach(button => {
-                button.addEventListener('click', () => {
-                    const category = button.dataset.filter;
-
-                    filterButtons.forEach(btn => btn.classList.remove('active'));
-                    button.classList.add('active');
-
-                    cards.forEach(card => {
-                        const match = category === 'all' || card.dataset.category === category;
-                        card.style.display = match ? 'grid' : 'none';
-                    });
-                });
-            });
-
-            const cardsData = {{ cards|tojson }};
-            const cardOverlay = document.getElementById('cardOverlay');
-            const cardOverlayTitle = document.getElementById('cardOverlayTitle');
-            const cardOverlayOverview = document.getElementById('cardOverlayOverview');
-            const cardOverlayClose = document.getElementById('cardOverlayClose');
-            const cardOverlayCancel = document.getElementById('cardOverlayCancel');
-            const cardOverlayGo = document.getElementById('cardOverlayGo');
-            const cardLookup = {};
-            cardsData.forEach(item => {
-                cardLookup[item.slug] = item;
-            });
-
-            const hideCardOverlay = () => {
-                if (cardOverlay) {
-                    cardOverlay.classList.remove('active');
-                }
-            };
-
-            cards.forEach(card => {
-                card.addEventListener('click', event => {
-                    if (event.target.closest('.card-link')) {
-                        return;
-                    }
-                    const slug = card.dataset.slug;
-                    const data = cardLookup[slug];
-
-                    if (!cardOverlay || !cardOverlayTitle || !cardOverlayOverview || !cardOverlayGo || !data) {
-                        window.location.href = `/card/${slug}`;
-                        return;
-                    }
+TEMPLATE_MODEL_DETAIL = """{% extends 'base.html' %}"""
 
-                    const overviewZh = data.overview_zh || data.insight_zh || '';
-                    const overviewEn = data.overview_en || data.insight_en || '';
-
-                    cardOverlayTitle.innerHTML = `${data.title_zh}<span class="en">${data.title_en}</span>`;
-                    cardOverlayOverview.innerHTML = `${overviewZh}<span class="en">${overviewEn}</span>`;
-                    cardOverlayGo.href = data.detail_url || `/card/${slug}`;
-                    cardOverlay.classList.add('active');
-                });
-            });
-
-            if (cardOverlayClose) {
-                cardOverlayClose.addEventListener('click', hideCardOverlay);
-            }
-            if (cardOverlayCancel) {
-                cardOverlayCancel.addEventListener('click', event => {
-                    event.preventDefault();
-                    hideCardOverlay();
-                });
-            }
-            if (cardOverlay) {
-                cardOverlay.addEventListener('click', event => {
-                    if (event.target === cardOverlay) {
-                        hideCardOverlay();
-                    }
-                });
-            }
-            document.addEventListener('keydown', event => {
-                if (event.key === 'Escape' && cardOverlay && cardOverlay.classList.contains('active')) {
-                    hideCardOverlay();
-                }
-            });
-
-            const modelsData = {{ models|tojson }};
-            const modelOverlay = document.getElementById('modelOverlay');
-            const modelCards = document.querySelectorAll('.model-card');
-            const modelDetailTitle = document.getElementById('modelDetailTitle');
-            const modelDetailDescription = document.getElementById('modelDetailDescription');
-            const modelDetailHighlights = document.getElementById('modelDetailHighlights');
-            const closeModelDetail = document.getElementById('closeModelDetail');
-
-            modelCards.forEach(card => {
-                card.addEventListener('click', () => {
-                    const modelId = card.dataset.model;
-                    const model = modelsData.find(item => item.id === modelId);
-                    if (!model) {
-                        return;
-                    }
-
-                    modelDetailTitle.innerHTML = `${model.title_zh}<span class="en">${model.title_en}</span>`;
-                    modelDetailDescription.innerHTML = `${model.description_zh}<span class="en">${model.description_en}</span>`;
-                    modelDetailHighlights.innerHTML = '';
-                    model.highlights.forEach(point => {
-                        const li = document.createElement('li');
-                        li.innerHTML = `${point.zh}<span class="en">${point.en}</span>`;
-                        modelDetailHighlights.appendChild(li);
-                    });
-
-                    modelOverlay.classList.add('active');
-                });
-            });
-
-            if (closeModelDetail) {
-                closeModelDetail.addEventListener('click', () => {
-                    modelOverlay.classList.remove('active');
-                });
-            }
-
-            if (modelOverlay) {
-                modelOverlay.addEventListener('click', event => {
-                    if (event.target === modelOverlay) {
-                        modelOverlay.classList.remove('active');
-                    }
-                });
-            }
-        }
-    </script>
-
-</body>
-</html>"""
+TEMPLATES = {
+    'base.html': TEMPLATE_BASE,
+    'home.html': TEMPLATE_HOME,
+    'card_detail.html': TEMPLATE_CARD_DETAIL,
+    'etf_detail.html': TEMPLATE_ETF_DETAIL,
+    'model_detail.html': TEMPLATE_MODEL_DETAIL,
+}
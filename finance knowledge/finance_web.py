@@ -1,31 +1,75 @@
-﻿# -*- coding: utf-8 -*-
-from pathlib import Path
-from datetime import datetime
-import time
-from flask import Flask, jsonify, render_template_string, abort
-import requests
-from openpyxl import Workbook, load_workbook
-from finance_content import (
-    CATEGORIES,
-    CARDS,
-    CARD_DETAILS,
-    CARD_DETAIL_CONTENT,
-    CARD_LOOKUP,
-    ETFS,
-    ETF_CARDS,
-    MODELS,
-    TEMPLATE,
-)
+﻿# -*- coding: utf-8 -*-
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+import asyncio
+import gzip
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+import click
+import numpy as np
+from flask import Flask, Response, jsonify, render_template, abort, request
+from jinja2 import ChoiceLoader, DictLoader, meta
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import httpx
+except ImportError:
+    httpx = None
+import black_scholes
+from etf_analytics import (
+    VAR_CONFIDENCES,
+    ReturnsModel,
+    aligned_log_returns,
+    capm_regression,
+    nav_matrix,
+    performance_stats,
+    portfolio_var,
+)
+from etf_series import EtfSeries
+from etf_store import ExcelStore, FileLock, SharedSeriesCache, open_store
+import monte_carlo
+from static_assets import load_assets, source_mtime
+import finance_content
+from finance_content import (
+    CATEGORIES,
+    CARDS,
+    CARD_DETAILS,
+    CARD_DETAIL_CONTENT,
+    CARD_LOOKUP,
+    ETFS,
+    ETF_CARDS,
+    MODELS,
+    TEMPLATES,
+)
 app = Flask(__name__)
+app.jinja_env.loader = ChoiceLoader([DictLoader(TEMPLATES), app.jinja_env.loader])
+PAGE_TEMPLATES = {
+    'home': app.jinja_env.get_template('home.html'),
+    'card_detail': app.jinja_env.get_template('card_detail.html'),
+    'model_detail': app.jinja_env.get_template('model_detail.html'),
+    'etf-detail': app.jinja_env.get_template('etf_detail.html'),
+}
+
+for card in ETF_CARDS:
+    card['detail_url'] = f"/etfs/{card.get('id', '').strip()}"
 
-for card in ETF_CARDS:
-    card['detail_url'] = f"/etfs/{card.get('id', '').strip()}"
-
-ETF_CARD_LOOKUP = {}
-for item in ETF_CARDS:
-    identifier = (item.get('id') or '').strip()
-    if identifier:
-        ETF_CARD_LOOKUP[identifier] = item
+ETF_CARD_LOOKUP = {}
+for item in ETF_CARDS:
+    identifier = (item.get('id') or '').strip()
+    if identifier:
+        ETF_CARD_LOOKUP[identifier] = item
         ETF_CARD_LOOKUP[identifier.lower()] = item
 
 MODEL_LOOKUP = {}
@@ -37,18 +81,121 @@ for model in MODELS:
     MODEL_LOOKUP[identifier.lower()] = model
     model['slug'] = identifier
 
+# Pages embed fingerprinted asset URLs, so an asset edit changes them too.
+CONTENT_MTIME = max(
+    Path(__file__).stat().st_mtime,
+    Path(finance_content.__file__).stat().st_mtime,
+    source_mtime(),
+)
+CACHE_CONTROL_POLICIES = {
+    'index': 'public, max-age=300',
+    'card_detail': 'public, max-age=3600',
+    'model_detail': 'public, max-age=3600',
+    'etf_category_detail': 'public, max-age=3600',
+    'etf_timeseries': 'public, max-age=60, stale-while-revalidate=600',
+    'etf_stats': 'public, max-age=60, stale-while-revalidate=600',
+    'etf_stats_bulk': 'public, max-age=60, stale-while-revalidate=600',
+    'card_data': 'public, max-age=3600',
+    'model_data': 'public, max-age=3600',
+    'static_asset': 'public, max-age=31536000, immutable',
+    'option_prices': 'public, max-age=3600',
+    'capm_summary': 'public, max-age=60, stale-while-revalidate=600',
+    'capm_series': 'public, max-age=60, stale-while-revalidate=600',
+}
+ASSET_URL_PREFIX = '/assets/'
+ASSETS = load_assets()
+ASSET_URLS = {name: f'{ASSET_URL_PREFIX}{asset.filename}' for name, asset in ASSETS.items()}
+COMPRESSION_MIN_SIZE = 1024
+PRECOMPRESSION_LEVELS = {
+    'gzip': 9,
+    'br': 11,
+}
+DYNAMIC_COMPRESSION_LEVELS = {
+    'gzip': 6,
+    'br': 4,
+}
+COMPRESSIBLE_MIMETYPES = frozenset([
+    'application/json',
+    'text/css',
+    'text/html',
+    'text/javascript',
+    'text/plain',
+])
+PAGE_CACHE_PRECOMPRESS = True
+PAGE_CACHE = {}
+STATIC_BUILD_DIR = Path(__file__).resolve().parent / 'build'
+STATIC_BUILD_MANIFEST_NAME = '.build-manifest.json'
+STATIC_ENCODING_SUFFIXES = {
+    'gzip': '.gz',
+    'br': '.br',
+}
+
 EASTMONEY_HISTORY_URL = 'https://fundmobapi.eastmoney.com/FundMNewApi/FundMNHisNetList'
+YAHOO_CHART_URL = 'https://query1.finance.yahoo.com/v8/finance/chart/'
+EASTMONEY_PAGE_SIZE = 35
+ETF_API_WINDOW = EASTMONEY_PAGE_SIZE
+EASTMONEY_MAX_PAGES = 12
+YAHOO_DEFAULT_RANGE = '6mo'
 EASTMONEY_HEADERS = {
     'User-Agent': 'Mozilla/5.0',
     'Referer': 'https://fund.eastmoney.com/',
 }
 
+DEBUG = os.environ.get('FINANCE_DEBUG', '').strip().lower() in ('1', 'true', 'yes', 'on')
+
 DATA_DIR = (Path(__file__).resolve().parent / 'data')
 DATA_DIR.mkdir(exist_ok=True)
 EXCEL_PATH = DATA_DIR / 'etf_monthly.xlsx'
+ETF_STORE_BACKEND = 'npy'
+ETF_STORE = open_store(ETF_STORE_BACKEND, DATA_DIR)
+REFRESH_LOCK_PATH = DATA_DIR / 'etf_refresh.lock'
+REFRESHER_LOCK_PATH = DATA_DIR / 'etf_refresher.lock'
 CACHE_MAX_AGE_SECONDS = 60 * 60 * 6
-ETF_CACHE = {}
-ETF_CACHE_MTIME = 0
+SHARED_CACHE = SharedSeriesCache(DATA_DIR / 'etf_shared')
+STATS_RISK_FREE_RATE = 0.02
+MONTE_CARLO_DEFAULT_PATHS = 100_000
+MONTE_CARLO_MAX_PATHS = 2_000_000
+MONTE_CARLO_DEFAULT_HORIZON = 21
+MONTE_CARLO_MAX_HORIZON = 756
+MONTE_CARLO_TIME_BUDGET_SECONDS = 10.0
+OPTION_GRID_MAX_CELLS = 100_000
+IMPLIED_VOL_MAX_QUOTES = 100_000
+VAR_MAX_HORIZON = 20
+VAR_DEFAULT_PATHS = 10_000
+VAR_MAX_PATHS = 100_000
+VAR_MAX_PORTFOLIOS = 10_000
+VAR_MAX_SCENARIO_CELLS = 100_000_000
+VAR_MODEL_CACHE_SIZE = 64
+CAPM_BENCHMARK = '510300'
+CAPM_WINDOWS = (20, 60, 120, 250)
+OPTION_TYPES = ('call', 'put')
+
+REFRESH_MAX_WORKERS = 8
+REFRESH_DEADLINE_SECONDS = 45
+PROVIDER_RATE_LIMITS = {
+    'eastmoney': 5.0,
+    'yahoo': 2.0,
+}
+PROVIDER_TIMEOUT_SECONDS = 6
+PROVIDER_POOL_SIZE = REFRESH_MAX_WORKERS
+PROVIDER_RETRIES = 2
+PROVIDER_BACKOFF_SECONDS = 0.5
+PROVIDER_RETRY_STATUSES = (500, 502, 503, 504)
+NEGATIVE_CACHE_TTL_SECONDS = 60 * 10
+BACKGROUND_CHECK_INTERVAL_SECONDS = 60 * 15
+BACKGROUND_CHECK_JITTER = 0.2
+BACKGROUND_REFRESH_AHEAD_RATIO = 0.75
+BACKGROUND_WAKE_MIN_INTERVAL_SECONDS = 60
+BACKGROUND_COMPACT_MIN_LOG_ROWS = 1
+A_SHARE_TIMEZONE = timezone(timedelta(hours=8))
+A_SHARE_REFRESH_HOURS = (9, 18)
+A_SHARE_POST_CLOSE_HOURS = (19, 23)
+_NEGATIVE_CACHE = {}
+_ASYNC_MISSING_FETCHES = {}
+_MISSING_FETCH_LOCKS = {}
+_MISSING_FETCH_LOCKS_GUARD = threading.Lock()
+_CACHE_LOCK = threading.Lock()
+_REFRESH_LOCK = threading.Lock()
 
 ETF_SYMBOL_MAP = {
     '510050': '510050.SS',
@@ -84,6 +231,9 @@ ETF_SYMBOL_MAP = {
     '513050': '513050.SS',
     '515680': '515680.SS',
 }
+KNOWN_TICKERS = frozenset(
+    [etf['ticker'].upper() for etf in ETFS] + list(ETF_SYMBOL_MAP)
+)
 
 
 
@@ -106,24 +256,386 @@ def _match_etfs_for_card(card):
     return results or ETFS
 
 
-def _render_page(page_type: str, **extra_context):
+def _is_not_modified(etag: str, last_modified=None):
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since and last_modified:
+        return int(last_modified) <= request.if_modified_since.timestamp()
+    return False
+
+
+def _not_modified_response(etag: str, last_modified=None):
+    response = Response(status=304)
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = int(last_modified)
+    return response
+
+
+def _gzip_compress(body: bytes, level: int):
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def _brotli_compress(body: bytes, level: int):
+    return brotli.compress(body, quality=level)
+
+
+COMPRESSORS = {'gzip': _gzip_compress}
+if brotli is not None:
+    COMPRESSORS['br'] = _brotli_compress
+
+
+class _EncodedBody:
+    __slots__ = ('body', 'etag', 'variants')
+
+    def __init__(self, body: bytes, precompress=True):
+        self.body = body
+        self.etag = hashlib.sha1(body).hexdigest()[:20]
+        self.variants = {}
+        if precompress and len(body) >= COMPRESSION_MIN_SIZE:
+            for encoding, compress in COMPRESSORS.items():
+                self.variants[encoding] = compress(body, PRECOMPRESSION_LEVELS[encoding])
+
+
+def _negotiate_encoding(variants):
+    for encoding in ('br', 'gzip'):
+        if encoding in variants and request.accept_encodings[encoding]:
+            return encoding
+    return None
+
+
+def _send_encoded(encoded, mimetype: str, last_modified=None):
+    encoding = _negotiate_encoding(encoded.variants)
+    etag = f'{encoded.etag}-{encoding}' if encoding else encoded.etag
+    if _is_not_modified(etag, last_modified):
+        response = _not_modified_response(etag, last_modified)
+    else:
+        response = Response(encoded.variants[encoding] if encoding else encoded.body, mimetype=mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.set_etag(etag)
+        if last_modified:
+            response.last_modified = int(last_modified)
+    if encoded.variants:
+        response.vary.add('Accept-Encoding')
+    return response
+
+
+class _RateLimiter:
+    def __init__(self, rate_per_second: float):
+        self.interval = 1.0 / rate_per_second if rate_per_second else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def _reserve(self):
+        if not self.interval:
+            return 0.0
+        with self._lock:
+            slot = max(time.monotonic(), self._next_slot)
+            self._next_slot = slot + self.interval
+        return slot - time.monotonic()
+
+    def acquire(self):
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class _ProviderClient:
+    def __init__(self, name: str, base_url: str, headers=None, timeout=None):
+        self.name = name
+        self.base_url = base_url
+        self.headers = dict(headers or {})
+        self.timeout = timeout or PROVIDER_TIMEOUT_SECONDS
+        self.limiter = _RateLimiter(PROVIDER_RATE_LIMITS.get(name, 0.0))
+        self._session = None
+        self._lock = threading.Lock()
+
+    def _build_session(self):
+        retry = Retry(
+            total=PROVIDER_RETRIES,
+            connect=PROVIDER_RETRIES,
+            read=PROVIDER_RETRIES,
+            status=PROVIDER_RETRIES,
+            backoff_factor=PROVIDER_BACKOFF_SECONDS,
+            status_forcelist=PROVIDER_RETRY_STATUSES,
+            allowed_methods=frozenset(['GET']),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=PROVIDER_POOL_SIZE,
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.headers.update(self.headers)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._build_session()
+        return self._session
+
+    def get_json(self, path='', params=None):
+        self.limiter.acquire()
+        response = self.session.get(
+            f'{self.base_url}{path}',
+            params=params,
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def close(self):
+        with self._lock:
+            session, self._session = self._session, None
+        if session is not None:
+            session.close()
+
+    def after_fork(self):
+        # The parent may have forked mid-request: replace the locks it could
+        # have held and drop the session whose sockets the parent still uses.
+        self._lock = threading.Lock()
+        self.limiter = _RateLimiter(PROVIDER_RATE_LIMITS.get(self.name, 0.0))
+        self.close()
+
+
+PROVIDER_CLIENTS = {
+    'eastmoney': _ProviderClient('eastmoney', EASTMONEY_HISTORY_URL, headers=EASTMONEY_HEADERS),
+    'yahoo': _ProviderClient('yahoo', YAHOO_CHART_URL),
+}
+
+
+class _ProviderConfigurationError(RuntimeError):
+    pass
+
+
+class _AsyncProviderClient:
+    def __init__(self, provider: _ProviderClient):
+        self.provider = provider
+        self._client = None
+
+    def _build_client(self):
+        transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(max_connections=PROVIDER_POOL_SIZE),
+        )
+        return httpx.AsyncClient(
+            headers=self.provider.headers,
+            timeout=self.provider.timeout,
+            transport=transport,
+        )
+
+    async def get_json(self, path='', params=None):
+        if httpx is None:
+            raise _ProviderConfigurationError('httpx is required for async provider requests')
+        if self._client is None:
+            self._client = self._build_client()
+        # Same policy as the sync session's Retry: connection errors and 5xx
+        # are retried with exponential backoff, anything else fails at once.
+        for attempt in range(PROVIDER_RETRIES + 1):
+            last_attempt = attempt == PROVIDER_RETRIES
+            await self.provider.limiter.acquire_async()
+            try:
+                response = await self._client.get(f'{self.provider.base_url}{path}', params=params)
+            except httpx.TransportError:
+                if last_attempt:
+                    raise
+            else:
+                if last_attempt or response.status_code not in PROVIDER_RETRY_STATUSES:
+                    response.raise_for_status()
+                    return response.json()
+            await asyncio.sleep(PROVIDER_BACKOFF_SECONDS * 2 ** attempt)
+
+    async def aclose(self):
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+
+ASYNC_PROVIDER_CLIENTS = {
+    name: _AsyncProviderClient(client) for name, client in PROVIDER_CLIENTS.items()
+}
+
+
+def _run_provider_requests(plan):
+    try:
+        provider, path, params = next(plan)
+        while True:
+            try:
+                payload = PROVIDER_CLIENTS[provider].get_json(path, params=params)
+            except Exception as exc:
+                provider, path, params = plan.throw(exc)
+            else:
+                provider, path, params = plan.send(payload)
+    except StopIteration as stop:
+        return stop.value
+
+
+async def _run_provider_requests_async(plan):
+    try:
+        provider, path, params = next(plan)
+        while True:
+            try:
+                payload = await ASYNC_PROVIDER_CLIENTS[provider].get_json(path, params=params)
+            except _ProviderConfigurationError:
+                raise
+            except Exception as exc:
+                provider, path, params = plan.throw(exc)
+            else:
+                provider, path, params = plan.send(payload)
+    except StopIteration as stop:
+        return stop.value
+
+
+async def close_async_provider_clients():
+    for client in ASYNC_PROVIDER_CLIENTS.values():
+        await client.aclose()
+
+
+def _page_context(page_type: str, **extra_context):
     context = {
         'categories': CATEGORIES,
         'cards': CARDS,
         'models': MODELS,
         'etfs': ETFS,
         'etf_cards': ETF_CARDS,
+        'assets': ASSET_URLS,
         'page_type': page_type,
     }
     context.update(extra_context)
-    return render_template_string(TEMPLATE, **context)
-def _format_series(raw_pairs):
+    return context
+
+
+def _render_page(page_type: str, **extra_context):
+    context = _page_context(page_type, **extra_context)
+    return render_template(PAGE_TEMPLATES[page_type], **context)
+
+
+def _home_page():
+    return 'home', {}
+
+
+def _card_detail_page(payload):
+    card = payload['card']
+    related = [
+        item for item in CARDS
+        if item.get('category') == card.get('category') and item.get('slug') != card.get('slug')
+    ][:3]
+    return 'card_detail', {'card_detail': payload, 'related_cards': related}
+
+
+def _model_detail_page(target):
+    slug_value = target.get('slug')
+    related = [
+        item for item in MODELS
+        if item.get('slug') != slug_value
+    ][:3]
+    return 'model_detail', {'model_detail': target, 'related_models': related}
+
+
+def _etf_category_page(card):
+    matched = _match_etfs_for_card(card)
+    primary = matched[0] if matched else None
+    return 'etf-detail', {'card': card, 'matched_etfs': matched, 'primary_etf': primary}
+
+
+def _static_pages():
+    yield ('index', ''), '/', _home_page, ()
+    for slug, payload in CARD_DETAILS.items():
+        yield ('card_detail', slug), f'/cards/{slug}', _card_detail_page, (payload,)
+    for model in MODELS:
+        if model.get('slug'):
+            yield ('model_detail', model['slug']), f"/models/{model['slug']}", _model_detail_page, (model,)
+    for card in ETF_CARDS:
+        identifier = (card.get('id') or '').strip()
+        if identifier:
+            yield ('etf_category_detail', identifier), card['detail_url'], _etf_category_page, (card,)
+
+
+ASSET_RESPONSES = {
+    asset.filename: (asset.mimetype, _EncodedBody(asset.content))
+    for asset in ASSETS.values()
+}
+
+
+def _encode_json(payload):
+    return _EncodedBody(json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+
+def _content_json_responses():
+    responses = {
+        '/api/cards': _encode_json(CARDS),
+        '/api/models': _encode_json(MODELS),
+    }
+    for category in CATEGORIES:
+        if category['id'] != 'all':
+            responses[f"/api/categories/{category['id']}/cards"] = _encode_json([
+                card for card in CARDS if card.get('category') == category['id']
+            ])
+    for card in CARDS:
+        responses[f"/api/cards/{card['slug']}"] = _encode_json(card)
+    for model in MODELS:
+        if model.get('slug'):
+            responses[f"/api/models/{model['slug']}"] = _encode_json(model)
+    return responses
+
+
+CONTENT_RESPONSES = _content_json_responses()
+
+
+def _send_content_json():
+    encoded = CONTENT_RESPONSES.get(request.path)
+    if encoded is None:
+        return jsonify({}), 404
+    return _send_encoded(encoded, 'application/json', CONTENT_MTIME)
+
+
+def _encode_page(html: str):
+    return _EncodedBody(html.encode('utf-8'), precompress=PAGE_CACHE_PRECOMPRESS)
+
+
+def _build_page(build, *args):
+    page_type, extra_context = build(*args)
+    return _encode_page(_render_page(page_type, **extra_context))
+
+
+def _send_page(key, build, *args):
+    page = PAGE_CACHE.get(key)
+    if page is None:
+        page = PAGE_CACHE[key] = _build_page(build, *args)
+    return _send_encoded(page, 'text/html', CONTENT_MTIME)
+
+
+def warm_page_cache():
+    for key, path, build, args in _static_pages():
+        if key in PAGE_CACHE:
+            continue
+        with app.test_request_context(path):
+            PAGE_CACHE[key] = _build_page(build, *args)
+    return len(PAGE_CACHE)
+
+
+class _YahooCloses(list):
+    """Exchange closes from the Yahoo fallback: served from memory, never persisted as NAVs."""
+
+
+def _format_series(raw_pairs, limit=EASTMONEY_PAGE_SIZE):
     if not raw_pairs:
         return []
 
     ordered = sorted(raw_pairs, key=lambda item: item[0])
-    if len(ordered) > 35:
-        ordered = ordered[-35:]
+    if limit and len(ordered) > limit:
+        ordered = ordered[-limit:]
     base = ordered[0][1] or 1
     if base == 0:
         base = 1
@@ -138,24 +650,44 @@ def _format_series(raw_pairs):
         })
     return series
 
-def _request_yahoo_series(symbol: str):
+
+def _a_share_today():
+    return datetime.now(A_SHARE_TIMEZONE).date()
+
+
+def _days_since(date_str: str):
+    try:
+        return (_a_share_today() - date.fromisoformat(date_str)).days
+    except ValueError:
+        return EASTMONEY_PAGE_SIZE
+
+
+def _last_known_date(ticker: str):
+    state = ETF_STATE
+    if ticker in state.fallback:
+        return None
+    series = state.cache.get(ticker)
+    return series.last_date() if series else None
+
+
+def _yahoo_series_requests(symbol: str):
+    # Only a full-history fallback: deltas extend NAV history and never come from Yahoo.
     symbol = (symbol or '').upper()
     if not symbol:
-        return []
+        return None
 
-    url = f'https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?interval=1d&range=6mo'
     try:
-        response = requests.get(url, timeout=6)
-        response.raise_for_status()
-        payload = response.json()
+        payload = yield 'yahoo', symbol, {'interval': '1d', 'range': YAHOO_DEFAULT_RANGE}
     except Exception:
-        return []
+        return None
 
     result = (payload.get('chart') or {}).get('result')
     if not result:
-        return []
+        return None
 
     first = result[0]
+    offset = (first.get('meta') or {}).get('gmtoffset')
+    exchange_tz = A_SHARE_TIMEZONE if offset is None else timezone(timedelta(seconds=offset))
     timestamps = first.get('timestamp') or []
     quote = (first.get('indicators') or {}).get('quote') or [{}]
     closes = quote[0].get('close') or []
@@ -165,47 +697,15 @@ def _request_yahoo_series(symbol: str):
         if close in (None, 'null'):
             continue
         try:
-            date_str = datetime.fromtimestamp(ts).strftime('%Y-%m-%d')
+            date_str = datetime.fromtimestamp(ts, exchange_tz).strftime('%Y-%m-%d')
         except Exception:
             continue
         raw_pairs.append((date_str, float(close)))
 
-    return _format_series(raw_pairs)
+    return _YahooCloses(_format_series(raw_pairs, limit=EASTMONEY_PAGE_SIZE))
 
-def _request_eastmoney_series(code: str):
-    code = (code or '').strip()
-    if not code:
-        return []
-
-    params = {
-        'FCODE': code,
-        'pageIndex': 1,
-        'pageSize': 35,
-        'appType': 'ttjj',
-        'product': 'EFund',
-        'plat': 'Iphone',
-        'deviceid': '00000000-0000-0000-0000-000000000000',
-        'Version': '1',
-        'lf': '1',
-        'ctoken': '',
-        'userId': '',
-        'u': '0',
-        'UToken': '',
-        'range': '1m',
-    }
-
-    try:
-        response = requests.get(
-            EASTMONEY_HISTORY_URL,
-            params=params,
-            headers=EASTMONEY_HEADERS,
-            timeout=6,
-        )
-        response.raise_for_status()
-        payload = response.json()
-    except Exception:
-        return []
 
+def _parse_eastmoney_items(payload):
     items = ((payload.get('Data') or {}).get('LSJZList')) or (payload.get('Datas') or [])
     raw_pairs = []
     for item in items:
@@ -218,136 +718,341 @@ def _request_eastmoney_series(code: str):
         except (TypeError, ValueError):
             continue
         raw_pairs.append((date_str, value))
+    return items, raw_pairs
+
+
+def _eastmoney_series_requests(code: str, since=None):
+    code = (code or '').strip()
+    if not code:
+        return None
+
+    if since is None:
+        page_size = EASTMONEY_PAGE_SIZE
+    else:
+        page_size = min(EASTMONEY_PAGE_SIZE, max(1, _days_since(since)))
+
+    raw_pairs = []
+    for page_index in range(1, EASTMONEY_MAX_PAGES + 1):
+        params = {
+            'FCODE': code,
+            'pageIndex': page_index,
+            'pageSize': page_size,
+            'appType': 'ttjj',
+            'product': 'EFund',
+            'plat': 'Iphone',
+            'deviceid': '00000000-0000-0000-0000-000000000000',
+            'Version': '1',
+            'lf': '1',
+            'ctoken': '',
+            'userId': '',
+            'u': '0',
+            'UToken': '',
+            'range': '1m',
+        }
 
-    return _format_series(raw_pairs)
+        try:
+            payload = yield 'eastmoney', '', params
+        except Exception:
+            if page_index == 1:
+                return None
+            break
+
+        items, page_pairs = _parse_eastmoney_items(payload)
+        if since is None:
+            raw_pairs.extend(page_pairs)
+            break
+
+        raw_pairs.extend(pair for pair in page_pairs if pair[0] > since)
+        reached_known = any(pair[0] <= since for pair in page_pairs)
+        if reached_known or len(items) < page_size:
+            break
+
+    return _format_series(raw_pairs, limit=None if since else EASTMONEY_PAGE_SIZE)
+
+
+def _persist_series(fetched, refreshed=True):
+    """Store fetched NAVs; return the updated series and the new fallback ticker set.
+
+    Yahoo closes never reach the store. They only stand in for a ticker that
+    has no NAV history anywhere, and stay flagged as fallback so the next
+    refresh refetches full NAVs instead of a delta from the Yahoo date.
+    """
+    navs = {ticker: series for ticker, series in fetched.items() if not isinstance(series, _YahooCloses)}
+    ETF_STORE.append(navs, refreshed=refreshed)
+    state = ETF_STATE
+    fallback = set(state.fallback)
+    merged = {}
+    for ticker, series in fetched.items():
+        if not series:
+            continue
+        known = state.cache.get(ticker)
+        if isinstance(series, _YahooCloses):
+            if known and ticker not in fallback:
+                continue
+            stored = ETF_STORE.load_ticker(ticker)
+            if stored:
+                merged[ticker] = stored
+                fallback.discard(ticker)
+            else:
+                merged[ticker] = EtfSeries.from_points(series)
+                fallback.add(ticker)
+        elif known and ticker not in fallback:
+            merged[ticker] = known.merge(series)
+        else:
+            merged[ticker] = ETF_STORE.load_ticker(ticker)
+            fallback.discard(ticker)
+    return merged, frozenset(fallback)
 
 
-def _write_records_to_excel(records):
-    wb = Workbook()
-    ws = wb.active
-    ws.title = 'etf_history'
-    ws.append(['ticker', 'date', 'nav', 'return_pct'])
-    for record in records:
-        ws.append([
-            record['ticker'],
-            record['date'],
-            record['nav'],
-            record['return_pct'],
-        ])
+def _import_legacy_excel():
+    if ETF_STORE.name == ExcelStore.name or not EXCEL_PATH.exists():
+        return False
 
-    meta = wb.create_sheet('meta')
-    meta.append(['generated_at', datetime.utcnow().isoformat(timespec='seconds')])
-    wb.save(EXCEL_PATH)
+    legacy = ExcelStore(EXCEL_PATH)
+    cache = legacy.load()
+    if not cache:
+        return False
+    ETF_STORE.save(cache, generated_at=legacy.mtime())
+    return True
 
 
-def _load_cache_from_excel():
-    if not EXCEL_PATH.exists():
-        return {}
+class _EncodedSeries(_EncodedBody):
+    __slots__ = ('series', 'mtime')
 
-    try:
-        wb = load_workbook(EXCEL_PATH, read_only=True, data_only=True)
-    except Exception:
-        return {}
+    def __init__(self, series, mtime):
+        self.series = series
+        self.mtime = mtime
+        super().__init__(json.dumps({
+            **series.tail(ETF_API_WINDOW).to_api(),
+            'as_of': datetime.fromtimestamp(mtime, A_SHARE_TIMEZONE).isoformat(timespec='seconds'),
+        }, separators=(',', ':')).encode('utf-8'))
 
-    if 'etf_history' not in wb.sheetnames:
-        return {}
 
-    sheet = wb['etf_history']
-    cache = {}
-    for ticker, date_value, nav_value, return_value in sheet.iter_rows(min_row=2, values_only=True):
-        if not ticker or not date_value:
+def _encode_responses(cache, mtime, previous):
+    responses = {}
+    for ticker, series in cache.items():
+        if not series:
             continue
-        if isinstance(date_value, datetime):
-            date_str = date_value.strftime('%Y-%m-%d')
-        else:
-            date_str = str(date_value)
+        encoded = previous.get(ticker)
+        if encoded is None or encoded.mtime != mtime or encoded.series != series:
+            encoded = _EncodedSeries(series, mtime)
+        responses[ticker] = encoded
+    return responses
+
+
+class _CacheState:
+    """One installed ETF cache, with everything derived from it.
+
+    A refresh builds a new state and then swaps the single ``ETF_STATE``
+    reference. A reader that takes ``ETF_STATE`` once therefore sees the
+    series, mtime, shared-cache generation, encoded responses and memos
+    of one refresh together. Only ``memos`` is filled in after install,
+    and only with values derived from this state's cache.
+    """
+
+    __slots__ = ('cache', 'mtime', 'generation', 'responses', 'fallback', 'memos')
+
+    def __init__(self, cache, mtime, generation, responses, fallback=frozenset()):
+        self.cache = cache
+        self.mtime = mtime
+        self.generation = generation
+        self.responses = responses
+        self.fallback = fallback
+        self.memos = {}
+
+
+ETF_STATE = _CacheState({}, 0, 0, {})
+
+
+def _install_cache(cache, mtime, generation=None, fallback=frozenset()):
+    global ETF_STATE
+    previous = ETF_STATE
+    state = _CacheState(
+        cache,
+        mtime,
+        previous.generation if generation is None else generation,
+        _encode_responses(cache, mtime, previous.responses),
+        frozenset(fallback),
+    )
+    _capm_summary(state, CAPM_BENCHMARK)
+    ETF_STATE = state
+
+
+def _publish_cache(cache, mtime, fallback=frozenset()):
+    try:
+        snapshot = SHARED_CACHE.publish(cache, mtime, fallback)
+    except OSError:
+        snapshot = None
+    if snapshot is None:
+        _install_cache(cache, mtime, fallback=fallback)
+        return
+    _install_cache(snapshot.cache, snapshot.mtime, snapshot.generation, snapshot.fallback)
+
+
+def _publish_store_cache(cache, mtime):
+    # Callers hold _CACHE_LOCK. The store only has NAVs, so fallback closes
+    # that no stored series replaces are carried over instead of dropped.
+    state = ETF_STATE
+    kept = {
+        ticker: state.cache[ticker]
+        for ticker in state.fallback
+        if ticker in state.cache and ticker not in cache
+    }
+    _publish_cache({**cache, **kept}, mtime, frozenset(kept))
+
+
+def _adopt_shared_cache():
+    generation = SHARED_CACHE.generation()
+    if not generation or generation <= ETF_STATE.generation:
+        return False
+    with _CACHE_LOCK:
+        # Whoever held the lock may have installed this generation or a newer one.
+        if generation <= ETF_STATE.generation:
+            return False
+        snapshot = SHARED_CACHE.load(generation)
+        if snapshot is None or not snapshot.cache:
+            return False
+        _install_cache(snapshot.cache, snapshot.mtime, snapshot.generation, snapshot.fallback)
+    return True
+
+
+def _merge_late_series(ticker, series):
+    if not series:
+        return
+    with _CACHE_LOCK:
+        updated, fallback = _persist_series({ticker: series})
+        merged = {**ETF_STATE.cache, **updated}
+        _publish_cache(merged, ETF_STORE.mtime(), fallback)
+
+
+def _late_result_callback(ticker):
+    def _callback(future):
         try:
-            nav = float(nav_value)
-        except (TypeError, ValueError):
-            continue
+            series = future.result()
+        except Exception:
+            series = []
+        _merge_late_series(ticker, series)
+    return _callback
+
+
+def _refresh_cache_from_remote(max_workers=None, deadline=None):
+    max_workers = max_workers or REFRESH_MAX_WORKERS
+    if deadline is None:
+        deadline = REFRESH_DEADLINE_SECONDS
+
+    executor = ThreadPoolExecutor(
+        max_workers=max_workers,
+        thread_name_prefix='etf-refresh',
+    )
+    futures = {
+        executor.submit(
+            _fetch_remote_etf_series,
+            etf['ticker'],
+            _last_known_date(etf['ticker']),
+        ): etf['ticker']
+        for etf in ETFS
+    }
+    done, not_done = wait(futures, timeout=deadline)
+    executor.shutdown(wait=False)
+
+    fetched = {}
+    for future in done:
         try:
-            pct = float(return_value)
-        except (TypeError, ValueError):
-            pct = 0.0
-        cache.setdefault(ticker.upper(), []).append({
-            'date': date_str,
-            'nav': round(nav, 4),
-            'return_pct': round(pct, 2),
-        })
+            series = future.result()
+        except Exception:
+            continue
+        if series is not None:
+            fetched[futures[future]] = series
 
-    for series in cache.values():
-        series.sort(key=lambda item: item['date'])
-    return cache
+    if fetched:
+        with _CACHE_LOCK:
+            updated, fallback = _persist_series(fetched)
+            merged = {**ETF_STATE.cache, **updated}
+            _publish_cache(merged, ETF_STORE.mtime(), fallback)
 
+    for future in not_done:
+        future.add_done_callback(_late_result_callback(futures[future]))
 
-def _group_records(records):
-    grouped = {}
-    for record in records:
-        grouped.setdefault(record['ticker'], []).append(record)
-    for series in grouped.values():
-        series.sort(key=lambda item: item['date'])
-    return grouped
+    return bool(fetched)
 
 
-def _refresh_cache_from_remote():
-    aggregated = []
-    for etf in ETFS:
-        ticker = etf['ticker']
-        series = _fetch_remote_etf_series(ticker)
-        if not series:
-            continue
-        for point in series:
-            aggregated.append({
-                'ticker': ticker,
-                'date': point['date'],
-                'nav': point['nav'],
-                'return_pct': point['return_pct'],
-            })
-
-    if not aggregated:
+def _reload_cache_from_store():
+    if not ETF_STORE.exists() and not _import_legacy_excel():
         return False
 
-    _write_records_to_excel(aggregated)
-    global ETF_CACHE, ETF_CACHE_MTIME
-    ETF_CACHE = _group_records(aggregated)
-    ETF_CACHE_MTIME = time.time()
-    return True
+    mtime = ETF_STORE.mtime()
+    _adopt_shared_cache()
+    state = ETF_STATE
+    if not state.cache or state.mtime != mtime:
+        with _CACHE_LOCK:
+            state = ETF_STATE
+            if not state.cache or state.mtime != mtime:
+                cache = ETF_STORE.load()
+                if cache:
+                    _publish_store_cache(cache, mtime)
+    return bool(ETF_STATE.cache) and (time.time() - mtime) < CACHE_MAX_AGE_SECONDS
 
 
-def ensure_etf_cache(force_refresh=False):
-    global ETF_CACHE, ETF_CACHE_MTIME
+def _single_flight_refresh(force=False):
+    has_stale = bool(ETF_STATE.cache)
+
+    if not _REFRESH_LOCK.acquire(blocking=False):
+        if has_stale:
+            return True
+        with _REFRESH_LOCK:
+            return bool(ETF_STATE.cache)
+
+    try:
+        file_lock = FileLock(REFRESH_LOCK_PATH)
+        if not file_lock.acquire(blocking=False):
+            if has_stale:
+                return True
+            if not file_lock.acquire():
+                return False
+            file_lock.release()
+            _reload_cache_from_store()
+            return bool(ETF_STATE.cache)
+
+        try:
+            if _reload_cache_from_store() and not force:
+                return True
+            return _refresh_cache_from_remote()
+        finally:
+            file_lock.release()
+    finally:
+        _REFRESH_LOCK.release()
+
 
+def ensure_etf_cache(force_refresh=False):
     if force_refresh:
-        if _refresh_cache_from_remote():
+        if _single_flight_refresh(force=True):
             return True
 
-    now = time.time()
+    _adopt_shared_cache()
+    state = ETF_STATE
+    if state.cache and (time.time() - state.mtime) < CACHE_MAX_AGE_SECONDS:
+        return True
 
-    if ETF_CACHE and (now - ETF_CACHE_MTIME) < CACHE_MAX_AGE_SECONDS:
+    if _reload_cache_from_store():
         return True
 
-    if EXCEL_PATH.exists():
-        mtime = EXCEL_PATH.stat().st_mtime
-        if not ETF_CACHE or ETF_CACHE_MTIME != mtime:
-            cache = _load_cache_from_excel()
-            if cache:
-                ETF_CACHE = cache
-                ETF_CACHE_MTIME = mtime
-        if ETF_CACHE and (now - mtime) < CACHE_MAX_AGE_SECONDS:
-            return True
+    if ETF_STATE.cache and _BACKGROUND_REFRESHER.is_running():
+        _BACKGROUND_REFRESHER.wake()
+        return True
 
-    if _refresh_cache_from_remote():
+    if _single_flight_refresh():
         return True
 
-    if ETF_CACHE:
+    if ETF_STATE.cache:
         return True
 
-    if EXCEL_PATH.exists():
-        cache = _load_cache_from_excel()
-        if cache:
-            ETF_CACHE = cache
-            ETF_CACHE_MTIME = EXCEL_PATH.stat().st_mtime
-            return True
+    if ETF_STORE.exists():
+        with _CACHE_LOCK:
+            if not ETF_STATE.cache:
+                cache = ETF_STORE.load()
+                if cache:
+                    _publish_store_cache(cache, ETF_STORE.mtime())
+        return bool(ETF_STATE.cache)
 
     return False
 
@@ -360,14 +1065,110 @@ def fetch_etf_series(ticker: str, force_refresh=False):
     if not ensure_etf_cache(force_refresh=force_refresh):
         return []
 
-    return ETF_CACHE.get(normalized, [])
-def _fetch_remote_etf_series(ticker: str):
+    return ETF_STATE.cache.get(normalized) or _fetch_missing_etf_series(normalized)
+
+
+def _missing_fetch_lock(ticker: str):
+    with _MISSING_FETCH_LOCKS_GUARD:
+        return _MISSING_FETCH_LOCKS.setdefault(ticker, threading.Lock())
+
+
+def _fetch_missing_etf_series(ticker: str):
+    if ticker not in KNOWN_TICKERS:
+        return []
+
+    lock = _missing_fetch_lock(ticker)
+    if not lock.acquire(blocking=False):
+        with lock:
+            return ETF_STATE.cache.get(ticker) or []
+
+    try:
+        cached = ETF_STATE.cache.get(ticker)
+        if cached:
+            return cached
+
+        now = time.time()
+        if _NEGATIVE_CACHE.get(ticker, 0) > now:
+            return []
+
+        series = _fetch_remote_etf_series(ticker)
+        if not series:
+            _NEGATIVE_CACHE[ticker] = now + NEGATIVE_CACHE_TTL_SECONDS
+            return []
+        _NEGATIVE_CACHE.pop(ticker, None)
+
+        return _merge_missing_series(ticker, series)
+    finally:
+        lock.release()
+
+
+def _merge_missing_series(ticker: str, series):
+    with _CACHE_LOCK:
+        updated, fallback = _persist_series({ticker: series}, refreshed=False)
+        merged = {**ETF_STATE.cache, **updated}
+        _publish_cache(merged, ETF_STATE.mtime, fallback)
+    return merged.get(ticker, [])
+
+
+async def _fetch_missing_once_async(ticker: str):
+    if httpx is None:
+        return await asyncio.to_thread(_fetch_missing_etf_series, ticker)
+    series = await _fetch_remote_etf_series_async(ticker)
+    if not series:
+        _NEGATIVE_CACHE[ticker] = time.time() + NEGATIVE_CACHE_TTL_SECONDS
+        return []
+    _NEGATIVE_CACHE.pop(ticker, None)
+    return await asyncio.to_thread(_merge_missing_series, ticker, series)
+
+
+async def _fetch_missing_etf_series_async(ticker: str):
+    if ticker not in KNOWN_TICKERS:
+        return []
+
+    if _NEGATIVE_CACHE.get(ticker, 0) > time.time():
+        return []
+
+    task = _ASYNC_MISSING_FETCHES.get(ticker)
+    if task is None:
+        task = _ASYNC_MISSING_FETCHES[ticker] = asyncio.ensure_future(_fetch_missing_once_async(ticker))
+        task.add_done_callback(lambda _: _ASYNC_MISSING_FETCHES.pop(ticker, None))
+    return await asyncio.shield(task)
+
+
+async def ensure_etf_cache_async(force_refresh=False):
+    if not force_refresh:
+        # The generation check is a read of the mapped counter; adopting takes
+        # _CACHE_LOCK and re-encodes every series, so it stays off the loop.
+        if SHARED_CACHE.generation() > ETF_STATE.generation:
+            await asyncio.to_thread(_adopt_shared_cache)
+        state = ETF_STATE
+        if state.cache and (time.time() - state.mtime) < CACHE_MAX_AGE_SECONDS:
+            return True
+        if state.cache and _BACKGROUND_REFRESHER.is_running():
+            _BACKGROUND_REFRESHER.wake()
+            return True
+    return await asyncio.to_thread(ensure_etf_cache, force_refresh)
+
+
+def _fetch_remote_etf_series(ticker: str, since=None):
+    return _run_provider_requests(_remote_series_requests(ticker, since))
+
+
+async def _fetch_remote_etf_series_async(ticker: str, since=None):
+    return await _run_provider_requests_async(_remote_series_requests(ticker, since))
+
+
+def _remote_series_requests(ticker: str, since=None):
     base = (ticker or '').upper()
     if not base:
+        return None
+
+    if since is not None and since >= _a_share_today().isoformat():
         return []
 
-    series = _request_eastmoney_series(base)
-    if series:
+    series = yield from _eastmoney_series_requests(base, since)
+    if series or since is not None:
+        # A delta only extends NAV history; Yahoo closes must not be mixed into it.
         return series
 
     candidates = []
@@ -381,12 +1182,283 @@ def _fetch_remote_etf_series(ticker: str):
             candidates.append(candidate)
 
     for symbol in candidates:
-        series = _request_yahoo_series(symbol)
+        series = yield from _yahoo_series_requests(symbol)
         if series:
             return series
 
-    return []
+    return None
+
+
+def _in_a_share_refresh_window(now=None, hours=A_SHARE_REFRESH_HOURS):
+    local = datetime.fromtimestamp(now or time.time(), A_SHARE_TIMEZONE)
+    if local.weekday() >= 5:
+        return False
+    start_hour, end_hour = hours
+    return start_hour <= local.hour < end_hour
+
 
+def _awaiting_post_close_nav(now=None):
+    if not _in_a_share_refresh_window(now, A_SHARE_POST_CLOSE_HOURS):
+        return False
+    today = datetime.fromtimestamp(now or time.time(), A_SHARE_TIMEZONE).date().isoformat()
+    return any(series.last_date() < today for series in ETF_STATE.cache.values() if series)
+
+
+class _BackgroundRefresher:
+    def __init__(self):
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._force = False
+        self._thread = None
+        self._refreshing = False
+        self._last_wake = 0.0
+        self._wake_lock = threading.Lock()
+        self._leader = None
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.is_running():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name='etf-background-refresh',
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def wake(self):
+        with self._wake_lock:
+            now = time.monotonic()
+            if self._refreshing or now - self._last_wake < BACKGROUND_WAKE_MIN_INTERVAL_SECONDS:
+                return False
+            self._last_wake = now
+        self._wake.set()
+        return True
+
+    def trigger(self):
+        self._force = True
+        self._wake.set()
+
+    def _next_delay(self):
+        jitter = random.uniform(-BACKGROUND_CHECK_JITTER, BACKGROUND_CHECK_JITTER)
+        return BACKGROUND_CHECK_INTERVAL_SECONDS * (1 + jitter)
+
+    def _due(self):
+        state = ETF_STATE
+        if not state.cache:
+            return True
+        if _awaiting_post_close_nav():
+            return True
+        if not _in_a_share_refresh_window():
+            return False
+        age = time.time() - state.mtime
+        return age >= CACHE_MAX_AGE_SECONDS * BACKGROUND_REFRESH_AHEAD_RATIO
+
+    def _lead(self):
+        # One refresher per data directory: the process holding the lock file
+        # polls the providers, the others only pick up what it stored. A dead
+        # leader's lock is released by the OS and the next check takes over.
+        if self._leader is None:
+            leader = FileLock(REFRESHER_LOCK_PATH)
+            if leader.acquire(blocking=False):
+                self._leader = leader
+        return self._leader is not None
+
+    def _compact_store(self):
+        # Appends only compact a ticker once its log reaches the store's
+        # threshold; the leader folds every remaining log into its base file
+        # while no trading-hours refresh is due.
+        if self._leader is None or _in_a_share_refresh_window() or _awaiting_post_close_nav():
+            return 0
+        return ETF_STORE.compact(min_log_rows=BACKGROUND_COMPACT_MIN_LOG_ROWS)
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                forced, self._force = self._force, False
+                self._refreshing = True
+                try:
+                    _reload_cache_from_store()
+                    if forced or (self._lead() and self._due()):
+                        _single_flight_refresh(force=True)
+                    self._compact_store()
+                except Exception:
+                    app.logger.exception('Background ETF refresh failed')
+                finally:
+                    self._refreshing = False
+                self._wake.wait(self._next_delay())
+                self._wake.clear()
+        finally:
+            leader, self._leader = self._leader, None
+            if leader is not None:
+                leader.release()
+
+
+_BACKGROUND_REFRESHER = _BackgroundRefresher()
+
+
+def start_background_refresh():
+    _BACKGROUND_REFRESHER.start()
+
+
+def _reinit_after_fork():
+    # Only the forking thread survives in the child, so any lock another
+    # thread held at fork time (a late refresh merge, a single-flight fetch)
+    # would stay locked forever. Start the child with fresh ones.
+    global _CACHE_LOCK, _REFRESH_LOCK, _MISSING_FETCH_LOCKS_GUARD, _BACKGROUND_REFRESHER
+    _CACHE_LOCK = threading.Lock()
+    _REFRESH_LOCK = threading.Lock()
+    _MISSING_FETCH_LOCKS_GUARD = threading.Lock()
+    _MISSING_FETCH_LOCKS.clear()
+    _ASYNC_MISSING_FETCHES.clear()
+    _BACKGROUND_REFRESHER = _BackgroundRefresher()
+    for client in PROVIDER_CLIENTS.values():
+        client.after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reinit_after_fork)
+
+
+def trigger_etf_refresh():
+    if _BACKGROUND_REFRESHER.is_running():
+        _BACKGROUND_REFRESHER.trigger()
+        return True
+    return ensure_etf_cache(force_refresh=True)
+
+
+def warm_up():
+    if not ETF_STORE.exists() and not _import_legacy_excel():
+        ensure_etf_cache(force_refresh=True)
+    else:
+        ensure_etf_cache()
+    warm_page_cache()
+
+
+@lru_cache(maxsize=None)
+def _template_inputs(name: str):
+    source = TEMPLATES[name]
+    parsed = app.jinja_env.parse(source)
+    sources = (source,)
+    names = frozenset(meta.find_undeclared_variables(parsed))
+    for parent in meta.find_referenced_templates(parsed):
+        if parent in TEMPLATES:
+            parent_sources, parent_names = _template_inputs(parent)
+            sources += parent_sources
+            names |= parent_names
+    return sources, names
+
+
+def _page_fingerprint(page_type: str, extra_context):
+    sources, names = _template_inputs(PAGE_TEMPLATES[page_type].name)
+    context = _page_context(page_type, **extra_context)
+    inputs = [sources, {name: context.get(name) for name in sorted(names)}]
+    return hashlib.sha1(json.dumps(
+        inputs,
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    ).encode('utf-8')).hexdigest()
+
+
+def _static_output_path(url_path: str):
+    relative = url_path.strip('/')
+    return f'{relative}/index.html' if relative else 'index.html'
+
+
+def _write_static_file(path: Path, encoded):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    outputs = [(path, encoded.body)]
+    for encoding, data in encoded.variants.items():
+        outputs.append((path.with_name(f'{path.name}{STATIC_ENCODING_SUFFIXES[encoding]}'), data))
+    for target, data in outputs:
+        tmp_path = target.with_name(f'{target.name}.{os.getpid()}.tmp')
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, target)
+
+
+def build_static_site(output_dir=STATIC_BUILD_DIR, force=False):
+    output_dir = Path(output_dir)
+    manifest_path = output_dir / STATIC_BUILD_MANIFEST_NAME
+    try:
+        previous = json.loads(manifest_path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        previous = {}
+    current = {}
+    written = 0
+
+    def emit(relative, fingerprint, encode):
+        nonlocal written
+        current[relative] = fingerprint
+        if not force and previous.get(relative) == fingerprint and (output_dir / relative).exists():
+            return
+        _write_static_file(output_dir / relative, encode())
+        written += 1
+
+    for _, path, build, args in _static_pages():
+        page_type, extra_context = build(*args)
+        with app.test_request_context(path):
+            emit(
+                _static_output_path(path),
+                _page_fingerprint(page_type, extra_context),
+                lambda: _EncodedBody(_render_page(page_type, **extra_context).encode('utf-8')),
+            )
+
+    for path, encoded in CONTENT_RESPONSES.items():
+        emit(f'{path.strip("/")}.json', encoded.etag, lambda: encoded)
+
+    for filename, (_, encoded) in ASSET_RESPONSES.items():
+        emit(f'{ASSET_URL_PREFIX.strip("/")}/{filename}', encoded.etag, lambda: encoded)
+
+    if ensure_etf_cache():
+        for ticker, encoded in ETF_STATE.responses.items():
+            emit(f'api/etf/{ticker}.json', encoded.etag, lambda: encoded)
+
+    removed = 0
+    for relative in set(previous) - set(current):
+        for suffix in ('', *STATIC_ENCODING_SUFFIXES.values()):
+            (output_dir / f'{relative}{suffix}').unlink(missing_ok=True)
+        removed += 1
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    tmp_path = manifest_path.with_name(f'{manifest_path.name}.{os.getpid()}.tmp')
+    tmp_path.write_text(json.dumps(current, indent=2, sort_keys=True), encoding='utf-8')
+    os.replace(tmp_path, manifest_path)
+    return written, len(current) - written, removed
+
+
+@app.cli.command('refresh-etf')
+def refresh_etf_command():
+    if ensure_etf_cache(force_refresh=True):
+        print(f'Refreshed {len(ETF_STATE.cache)} ETF series into {ETF_STORE.path}')
+    else:
+        print('ETF refresh failed')
+
+
+@app.cli.command('export-etf-excel')
+def export_etf_excel_command():
+    if not ensure_etf_cache():
+        print('No ETF data available to export')
+        return
+    state = ETF_STATE
+    ExcelStore(EXCEL_PATH).save(state.cache, generated_at=state.mtime)
+    print(f'Exported {len(state.cache)} ETF series to {EXCEL_PATH}')
+
+
+@app.cli.command('build-static')
+@click.option('--output', '-o', type=click.Path(file_okay=False, path_type=Path),
+              default=STATIC_BUILD_DIR, show_default=True, help='Directory to write the site into.')
+@click.option('--force', is_flag=True, help='Rewrite every file, even if its inputs are unchanged.')
+def build_static_command(output, force):
+    written, unchanged, removed = build_static_site(output, force=force)
+    print(f'Built static site in {output}: {written} written, {unchanged} unchanged, {removed} removed')
 
 
 @app.route('/models/<slug>')
@@ -397,37 +1469,18 @@ def model_detail(slug: str):
     if not target:
         abort(404)
 
-    slug_value = target.get('slug') or normalized
-    related = [
-        item for item in MODELS
-        if item.get('slug') != slug_value
-    ][:3]
-
-    return _render_page(
-        'model_detail',
-        model_detail=target,
-        related_models=related,
-    )
+    return _send_page(('model_detail', target['slug']), _model_detail_page, target)
 
 
 @app.route('/cards/<slug>')
 @app.route('/card/<slug>')
 def card_detail(slug: str):
-    payload = CARD_DETAILS.get(slug) or CARD_DETAILS.get((slug or '').strip())
+    normalized = (slug or '').strip()
+    payload = CARD_DETAILS.get(slug) or CARD_DETAILS.get(normalized)
     if not payload:
         abort(404)
 
-    card = payload['card']
-    related = [
-        item for item in CARDS
-        if item.get('category') == card.get('category') and item.get('slug') != card.get('slug')
-    ][:3]
-
-    return _render_page(
-        'card_detail',
-        card_detail=payload,
-        related_cards=related,
-    )
+    return _send_page(('card_detail', payload['card'].get('slug') or normalized), _card_detail_page, payload)
 
 
 @app.route('/etfs/<card_id>')
@@ -438,50 +1491,613 @@ def etf_category_detail(card_id: str):
     if not card:
         abort(404)
 
-    matched = _match_etfs_for_card(card)
-    primary = matched[0] if matched else None
-
-    return _render_page(
-        'etf-detail',
-        card=card,
-        matched_etfs=matched,
-        primary_etf=primary,
-    )
+    return _send_page(('etf_category_detail', card['id'].strip()), _etf_category_page, card)
 
 @app.route('/api/etf/<ticker>')
 def etf_timeseries(ticker: str):
     normalized = (ticker or '').upper()
     if not normalized:
-        return jsonify({'dates': [], 'navs': [], 'returns': []}), 400
+        return _empty_etf_response(400)
+
+    if normalized not in KNOWN_TICKERS:
+        return _empty_etf_response(404)
 
     if not ensure_etf_cache():
-        return jsonify({'dates': [], 'navs': [], 'returns': []}), 502
+        return _empty_etf_response(502)
 
-    series = ETF_CACHE.get(normalized)
-    if not series:
-        if not ensure_etf_cache(force_refresh=True):
-            return jsonify({'dates': [], 'navs': [], 'returns': []}), 502
-        series = ETF_CACHE.get(normalized, [])
-    if not series:
-        return jsonify({'dates': [], 'navs': [], 'returns': []}), 404
+    encoded = ETF_STATE.responses.get(normalized)
+    if encoded is None and _fetch_missing_etf_series(normalized):
+        encoded = ETF_STATE.responses.get(normalized)
+    if encoded is None:
+        return _empty_etf_response(404)
+
+    return _send_etf_series(encoded)
+
+
+async def etf_timeseries_async(ticker: str):
+    normalized = (ticker or '').upper()
+    if not normalized:
+        return _empty_etf_response(400)
+
+    if normalized not in KNOWN_TICKERS:
+        return _empty_etf_response(404)
+
+    if not await ensure_etf_cache_async():
+        return _empty_etf_response(502)
+
+    encoded = ETF_STATE.responses.get(normalized)
+    if encoded is None and await _fetch_missing_etf_series_async(normalized):
+        encoded = ETF_STATE.responses.get(normalized)
+    if encoded is None:
+        return _empty_etf_response(404)
+
+    return _send_etf_series(encoded)
+
+
+def _cache_memo(state, name: str):
+    return state.memos.setdefault(name, {})
+
+
+def _stat_value(value, digits=4):
+    value = float(value)
+    return round(value, digits) if math.isfinite(value) else None
+
+
+def _compute_stats(cache, tickers):
+    series_list = [cache[ticker] for ticker in tickers]
+    stats = performance_stats(nav_matrix(series_list), risk_free_rate=STATS_RISK_FREE_RATE)
+    results = {}
+    for row, (ticker, series) in enumerate(zip(tickers, series_list)):
+        results[ticker] = {
+            'ticker': ticker,
+            'start': series[0]['date'],
+            'end': series.last_date(),
+            'observations': int(stats['observations'][row]),
+            'risk_free_rate': STATS_RISK_FREE_RATE,
+            **{
+                name: _stat_value(values[row])
+                for name, values in stats.items()
+                if name != 'observations'
+            },
+        }
+    return results
+
+
+def _stats_response(key):
+    state = ETF_STATE
+    cache, entries = state.cache, _cache_memo(state, 'stats')
+    encoded = entries.get(key)
+    if encoded is None:
+        tickers = [ticker for ticker in (sorted(cache) if key == '*' else [key]) if cache.get(ticker)]
+        if not tickers:
+            return None
+        results = _compute_stats(cache, tickers)
+        encoded = entries[key] = _encode_json({'stats': results} if key == '*' else results[key])
+    return _send_encoded(encoded, 'application/json', state.mtime)
+
+
+def _compute_capm(cache, benchmark):
+    results = {}
+    for ticker in dict.fromkeys(etf['ticker'].upper() for etf in ETFS):
+        if ticker == benchmark or not cache.get(ticker):
+            continue
+        days, log_returns = aligned_log_returns(cache, [ticker, benchmark])
+        if len(log_returns) < 2:
+            continue
+        asset, market = np.expm1(log_returns).T
+        full = capm_regression(asset, market, risk_free_rate=STATS_RISK_FREE_RATE)
+        results[ticker] = {
+            'days': days,
+            'full': {name: values[0] for name, values in full.items()},
+            'rolling': {
+                window: capm_regression(asset, market, window, STATS_RISK_FREE_RATE)
+                for window in CAPM_WINDOWS
+                if window <= len(asset)
+            },
+        }
+    return results
+
+
+def _capm_results(state, benchmark):
+    cache, entries = state.cache, _cache_memo(state, 'capm')
+    if benchmark not in entries:
+        entries[benchmark] = _compute_capm(cache, benchmark) if cache.get(benchmark) else None
+    return entries, entries[benchmark]
+
+
+def _capm_summary(state, benchmark):
+    entries, results = _capm_results(state, benchmark)
+    if results is None:
+        return None
+    encoded = entries.get((benchmark, '*'))
+    if encoded is None:
+        etfs = {}
+        for ticker, result in results.items():
+            days = result['days']
+            etfs[ticker] = {
+                'start': date.fromordinal(int(days[0])).isoformat(),
+                'end': date.fromordinal(int(days[-1])).isoformat(),
+                'observations': len(days),
+                **{name: _stat_value(value) for name, value in result['full'].items()},
+                'rolling': {
+                    str(window): {name: _stat_value(values[-1]) for name, values in rolling.items()}
+                    for window, rolling in result['rolling'].items()
+                },
+            }
+        encoded = entries[(benchmark, '*')] = _encode_json({
+            'benchmark': benchmark,
+            'risk_free_rate': STATS_RISK_FREE_RATE,
+            'windows': list(CAPM_WINDOWS),
+            'etfs': etfs,
+        })
+    return encoded
+
+
+def _capm_series(state, benchmark, ticker, window):
+    entries, results = _capm_results(state, benchmark)
+    result = (results or {}).get(ticker)
+    if result is None or window not in result['rolling']:
+        return None
+    key = (benchmark, ticker, window)
+    encoded = entries.get(key)
+    if encoded is None:
+        rolling = result['rolling'][window]
+        encoded = entries[key] = _encode_json({
+            'ticker': ticker,
+            'benchmark': benchmark,
+            'window': window,
+            'dates': [date.fromordinal(int(day)).isoformat() for day in result['days'][window - 1:]],
+            **{name: [_stat_value(value) for value in values] for name, values in rolling.items()},
+        })
+    return encoded
+
+
+def _capm_benchmark():
+    benchmark = (request.args.get('benchmark') or CAPM_BENCHMARK).strip().upper()
+    if benchmark not in KNOWN_TICKERS:
+        raise ValueError(f'unknown benchmark: {benchmark}')
+    return benchmark
+
+
+def _int_arg(name: str, default, low: int, high: int):
+    raw = request.args.get(name)
+    if raw in (None, ''):
+        return default
+    value = int(raw)
+    if not low <= value <= high:
+        raise ValueError(f'{name} must be between {low} and {high}')
+    return value
+
+
+def _float_arg(name: str, default, low: float, high: float):
+    raw = request.args.get(name)
+    if raw in (None, ''):
+        return default
+    value = float(raw)
+    if not low <= value <= high:
+        raise ValueError(f'{name} must be between {low} and {high}')
+    return value
+
+
+def _float_list_arg(name: str, positive: bool = True):
+    raw = request.args.get(name) or ''
+    values = np.array([float(item) for item in raw.split(',') if item.strip()])
+    if not values.size:
+        raise ValueError(f'{name} is required')
+    if not np.all(np.isfinite(values)) or (positive and np.any(values <= 0)):
+        raise ValueError(f'{name} must be finite{" and positive" if positive else ""}')
+    return values
+
+
+def _option_calls(value):
+    kinds = np.atleast_1d(np.asarray(value, dtype=object))
+    if not all(kind in OPTION_TYPES for kind in kinds):
+        raise ValueError(f'type must be one of: {", ".join(OPTION_TYPES)}')
+    calls = kinds == 'call'
+    return calls if np.ndim(value) else bool(calls[0])
+
+
+def _json_array(body: dict, name: str, default=None, positive: bool = True):
+    value = body.get(name, default)
+    if value is None:
+        raise ValueError(f'{name} is required')
+    try:
+        values = np.asarray(value, dtype=np.float64)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be a number or a list of numbers') from None
+    if values.ndim > 1 or not np.all(np.isfinite(values)) or (positive and np.any(values <= 0)):
+        raise ValueError(f'{name} must be a finite{" positive" if positive else ""} number or a flat list')
+    return values
+
+
+def _portfolio_args():
+    tickers = [item.strip().upper() for item in (request.args.get('tickers') or '').split(',') if item.strip()]
+    if not tickers:
+        raise ValueError('tickers is required')
+    if len(set(tickers)) != len(tickers):
+        raise ValueError('tickers must be unique')
+    unknown = [ticker for ticker in tickers if ticker not in KNOWN_TICKERS]
+    if unknown:
+        raise ValueError(f'unknown tickers: {", ".join(unknown)}')
+
+    raw_weights = request.args.get('weights')
+    if raw_weights:
+        weights = np.array([float(item) for item in raw_weights.split(',')])
+        if len(weights) != len(tickers):
+            raise ValueError('weights must match tickers')
+    else:
+        weights = np.ones(len(tickers))
+    if not np.all(np.isfinite(weights)) or weights.sum() <= 0:
+        raise ValueError('weights must be finite and sum to a positive number')
+    return tickers, weights / weights.sum()
+
+
+def _portfolio_returns(tickers):
+    cache = ETF_STATE.cache
+    missing = [ticker for ticker in tickers if not cache.get(ticker)]
+    if missing:
+        raise LookupError(f'no cached history for: {", ".join(missing)}')
+    return aligned_log_returns(cache, tickers)
+
+
+def _risk_universe():
+    cache = ETF_STATE.cache
+    return [ticker for ticker in dict.fromkeys(etf['ticker'].upper() for etf in ETFS) if cache.get(ticker)]
+
+
+def _risk_model(tickers, horizon: int):
+    # Aligned on the portfolio's own tickers only: one short-history ETF in the
+    # universe must not cut every other portfolio's sample down to its dates.
+    state = ETF_STATE
+    cache, entries = state.cache, _cache_memo(state, 'risk')
+    key = (tuple(sorted(tickers)), horizon)
+    if key not in entries:
+        days, log_returns = aligned_log_returns(cache, key[0])
+        model = ReturnsModel(key[0], days, log_returns, horizon) if len(log_returns) > horizon else None
+        while len(entries) >= VAR_MODEL_CACHE_SIZE:
+            entries.pop(next(iter(entries)), None)
+        entries[key] = model
+    return entries[key]
+
+
+def _weight_batch(body: dict, universe):
+    tickers = body.get('tickers') or universe
+    if not isinstance(tickers, list) or not all(isinstance(ticker, str) for ticker in tickers):
+        raise ValueError('tickers must be a list of strings')
+    tickers = [ticker.strip().upper() for ticker in tickers]
+    if len(set(tickers)) != len(tickers):
+        raise ValueError('tickers must be unique')
+    unknown = [ticker for ticker in tickers if ticker not in KNOWN_TICKERS]
+    if unknown:
+        raise ValueError(f'unknown tickers: {", ".join(unknown)}')
+
+    try:
+        weights = np.atleast_2d(np.asarray(body.get('weights'), dtype=np.float64))
+    except (TypeError, ValueError):
+        raise ValueError('weights must be a list of weight rows') from None
+    if weights.ndim != 2 or weights.shape[1] != len(tickers):
+        raise ValueError(f'each weight row needs {len(tickers)} values')
+    if len(weights) > VAR_MAX_PORTFOLIOS:
+        raise ValueError(f'at most {VAR_MAX_PORTFOLIOS} portfolios per request')
+    totals = weights.sum(axis=1)
+    if not np.all(np.isfinite(weights)) or np.any(totals <= 0):
+        raise ValueError('weight rows must be finite and sum to a positive number')
+    return tickers, weights / totals[:, None]
+
+
+def _var_table(var, cvar, single: bool):
+    def column(values):
+        values = np.round(values, 6)
+        return float(values[0]) if single else values.tolist()
+
+    labels = [f'{confidence * 100:g}' for confidence in VAR_CONFIDENCES]
+    return {
+        'var': {label: column(var[row]) for row, label in enumerate(labels)},
+        'cvar': {label: column(cvar[row]) for row, label in enumerate(labels)},
+    }
+
+
+def _empty_etf_response(status: int):
+    return jsonify({'dates': [], 'navs': [], 'returns': []}), status
+
+
+def _send_etf_series(encoded):
+    response = _send_encoded(encoded, 'application/json', encoded.mtime)
+    response.headers['X-Data-Age'] = str(max(0, int(time.time() - encoded.mtime)))
+    return response
+
+@app.route('/api/etf/stats')
+def etf_stats_bulk():
+    if not ensure_etf_cache():
+        return jsonify({'stats': {}}), 502
+
+    response = _stats_response('*')
+    if response is None:
+        return jsonify({'stats': {}}), 404
+    return response
+
+
+@app.route('/api/etf/<ticker>/stats')
+def etf_stats(ticker: str):
+    normalized = (ticker or '').upper()
+    if normalized not in KNOWN_TICKERS:
+        return jsonify({}), 404
+
+    if not ensure_etf_cache():
+        return jsonify({}), 502
+
+    response = _stats_response(normalized)
+    if response is None:
+        return jsonify({}), 404
+    return response
+
+
+@app.route('/api/analytics/black-scholes/price', endpoint='option_prices')
+def black_scholes_prices():
+    try:
+        axes = {name: _float_list_arg(name) for name in ('spot', 'strike', 'expiry', 'vol')}
+        rate = _float_arg('rate', 0.0, -1.0, 1.0)
+        dividend = _float_arg('dividend', 0.0, -1.0, 1.0)
+        option_type = request.args.get('type') or 'call'
+        is_call = _option_calls(option_type)
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+    cells = math.prod(len(axis) for axis in axes.values())
+    if cells > OPTION_GRID_MAX_CELLS:
+        return jsonify({'error': f'grid has {cells} cells; the limit is {OPTION_GRID_MAX_CELLS}'}), 400
+
+    grid = black_scholes.price_grid(*axes.values(), rate=rate, dividend=dividend, is_call=is_call)
+    return jsonify({
+        'type': option_type,
+        'rate': rate,
+        'dividend': dividend,
+        'axes': {name: axis.tolist() for name, axis in axes.items()},
+        'shape': list(grid['price'].shape),
+        **{greek: np.round(grid[greek], 6).tolist() for greek in black_scholes.GREEKS},
+    })
 
+
+@app.route('/api/analytics/black-scholes/implied-vol', methods=['POST'])
+def black_scholes_implied_vol():
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return jsonify({'error': 'expected a JSON object'}), 400
+    try:
+        prices = _json_array(body, 'price')
+        spot = _json_array(body, 'spot')
+        strike = _json_array(body, 'strike')
+        expiry = _json_array(body, 'expiry')
+        rate = _json_array(body, 'rate', 0.0, positive=False)
+        dividend = _json_array(body, 'dividend', 0.0, positive=False)
+        is_call = _option_calls(body.get('type', 'call'))
+        shape = np.broadcast_shapes(*(np.shape(value) for value in (prices, spot, strike, expiry, rate, dividend, is_call)))
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+    if math.prod(shape) > IMPLIED_VOL_MAX_QUOTES:
+        return jsonify({'error': f'at most {IMPLIED_VOL_MAX_QUOTES} quotes per request'}), 400
+
+    vols, iterations = black_scholes.implied_volatility(prices, spot, strike, expiry, rate, dividend, is_call)
+    solved = ~np.isnan(vols)
     return jsonify({
-        'dates': [point['date'] for point in series],
-        'navs': [point['nav'] for point in series],
-        'returns': [point['return_pct'] for point in series],
+        'implied_vol': np.where(solved, np.round(vols, 8), None).tolist(),
+        'solved': int(solved.sum()),
+        'iterations': iterations,
     })
 
+
+@app.route('/api/analytics/capm')
+def capm_summary():
+    try:
+        benchmark = _capm_benchmark()
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+    if not ensure_etf_cache():
+        return jsonify({'error': 'ETF data unavailable'}), 502
+
+    state = ETF_STATE
+    encoded = _capm_summary(state, benchmark)
+    if encoded is None:
+        return jsonify({'error': f'no cached history for: {benchmark}'}), 404
+    return _send_encoded(encoded, 'application/json', state.mtime)
+
+
+@app.route('/api/analytics/capm/<ticker>')
+def capm_series(ticker: str):
+    normalized = (ticker or '').upper()
+    try:
+        benchmark = _capm_benchmark()
+        window = _int_arg('window', 60, 1, max(CAPM_WINDOWS))
+        if window not in CAPM_WINDOWS:
+            raise ValueError(f'window must be one of: {", ".join(map(str, CAPM_WINDOWS))}')
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+    if normalized not in KNOWN_TICKERS:
+        return jsonify({}), 404
+    if not ensure_etf_cache():
+        return jsonify({}), 502
+
+    state = ETF_STATE
+    encoded = _capm_series(state, benchmark, normalized, window)
+    if encoded is None:
+        return jsonify({}), 404
+    return _send_encoded(encoded, 'application/json', state.mtime)
+
+
+@app.route('/api/analytics/var', methods=['GET', 'POST'])
+def value_at_risk():
+    try:
+        horizon = _int_arg('horizon', 1, 1, VAR_MAX_HORIZON)
+        paths = _int_arg('paths', VAR_DEFAULT_PATHS, 100, VAR_MAX_PATHS)
+        seed = _int_arg('seed', 0, 0, 2 ** 32 - 1)
+        if request.method == 'GET':
+            tickers, weights = _portfolio_args()
+            weights = weights[None, :]
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+
+    if not ensure_etf_cache():
+        return jsonify({'error': 'ETF data unavailable'}), 502
+
+    if request.method == 'POST':
+        body = request.get_json(silent=True)
+        if not isinstance(body, dict):
+            return jsonify({'error': 'expected a JSON object'}), 400
+        try:
+            tickers, weights = _weight_batch(body, _risk_universe())
+        except ValueError as exc:
+            return jsonify({'error': str(exc)}), 400
+        if len(weights) * paths > VAR_MAX_SCENARIO_CELLS:
+            return jsonify({'error': f'portfolios x paths must not exceed {VAR_MAX_SCENARIO_CELLS}'}), 400
+
+    missing = [ticker for ticker in tickers if not ETF_STATE.cache.get(ticker)]
+    if missing:
+        return jsonify({'error': f'no cached history for: {", ".join(missing)}'}), 404
+    model = _risk_model(tickers, horizon)
+    if model is None:
+        return jsonify({'error': 'not enough overlapping history'}), 422
+
+    columns = {ticker: index for index, ticker in enumerate(model.tickers)}
+    exposures = np.zeros((len(weights), len(columns)))
+    exposures[:, [columns[ticker] for ticker in tickers]] = weights
+
+    single = request.method == 'GET'
+    results = portfolio_var(model, exposures, paths=paths, seed=seed)
+    payload = {
+        'tickers': tickers,
+        'horizon': horizon,
+        'observations': len(model.returns),
+        'start': date.fromordinal(int(model.days[0])).isoformat(),
+        'end': date.fromordinal(int(model.days[-1])).isoformat(),
+        'paths': paths,
+        'seed': seed,
+        'confidence': list(VAR_CONFIDENCES),
+    }
+    if single:
+        payload['weights'] = np.round(weights[0], 6).tolist()
+    else:
+        payload['portfolios'] = len(weights)
+    payload['methods'] = {
+        method: _var_table(var, cvar, single) for method, (var, cvar) in results.items()
+    }
+    return jsonify(payload)
+
+
+@app.route('/api/analytics/monte-carlo')
+def monte_carlo_simulation():
+    try:
+        tickers, weights = _portfolio_args()
+        horizon = _int_arg('horizon', MONTE_CARLO_DEFAULT_HORIZON, 1, MONTE_CARLO_MAX_HORIZON)
+        paths = _int_arg('paths', MONTE_CARLO_DEFAULT_PATHS, 1, MONTE_CARLO_MAX_PATHS)
+        seed = _int_arg('seed', None, 0, 2 ** 32 - 1)
+        confidence = _float_arg('confidence', 0.95, 0.5, 0.999)
+        budget = _float_arg('budget', MONTE_CARLO_TIME_BUDGET_SECONDS, 0.1, MONTE_CARLO_TIME_BUDGET_SECONDS)
+        method = request.args.get('method') or 'bootstrap'
+        if method not in monte_carlo.METHODS:
+            raise ValueError(f'method must be one of: {", ".join(monte_carlo.METHODS)}')
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+
+    if not ensure_etf_cache():
+        return jsonify({'error': 'ETF data unavailable'}), 502
+    try:
+        _, log_returns = _portfolio_returns(tickers)
+    except LookupError as exc:
+        return jsonify({'error': str(exc)}), 404
+    if len(log_returns) < 2:
+        return jsonify({'error': 'not enough overlapping history'}), 422
+
+    simulation = monte_carlo.run_simulation(
+        log_returns,
+        weights,
+        horizon,
+        paths,
+        method=method,
+        seed=seed,
+        confidence=confidence,
+        time_budget=budget,
+    )
+    meta = {
+        'tickers': tickers,
+        'weights': np.round(weights, 6).tolist(),
+        'horizon': horizon,
+        'method': method,
+        'observations': len(log_returns),
+    }
+    if request.args.get('stream') in ('1', 'true'):
+        return Response(
+            (json.dumps({**meta, **summary}) + '\n' for summary in simulation),
+            mimetype='application/x-ndjson',
+        )
+    for summary in simulation:
+        pass
+    return jsonify({**meta, **summary})
+
+
+@app.route('/api/cards')
+@app.route('/api/cards/<slug>')
+@app.route('/api/categories/<category>/cards')
+def card_data(slug=None, category=None):
+    return _send_content_json()
+
+
+@app.route('/api/models')
+@app.route('/api/models/<slug>')
+def model_data(slug=None):
+    return _send_content_json()
+
+
+@app.route(f'{ASSET_URL_PREFIX}<filename>')
+def static_asset(filename: str):
+    if filename not in ASSET_RESPONSES:
+        abort(404)
+    mimetype, encoded = ASSET_RESPONSES[filename]
+    return _send_encoded(encoded, mimetype)
+
+
 @app.route('/')
 def index():
-    return _render_page('home')
+    return _send_page(('index', ''), _home_page)
+
+
+@app.after_request
+def _compress_response(response):
+    if (
+        response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or response.is_streamed
+        or response.direct_passthrough
+        or 'Content-Encoding' in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+    body = response.get_data()
+    if len(body) < COMPRESSION_MIN_SIZE:
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = _negotiate_encoding(COMPRESSORS)
+    if encoding is None:
+        return response
+    response.set_data(COMPRESSORS[encoding](body, DYNAMIC_COMPRESSION_LEVELS[encoding]))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f'{etag}-{encoding}', weak)
+    return response
+
+
+@app.after_request
+def _apply_cache_control(response):
+    policy = CACHE_CONTROL_POLICIES.get(request.endpoint)
+    if policy and response.status_code in (200, 304) and 'Cache-Control' not in response.headers:
+        response.headers['Cache-Control'] = policy
+    return response
 
 
 if __name__ == '__main__':
-    if not EXCEL_PATH.exists():
-        ensure_etf_cache(force_refresh=True)
-    else:
-        ensure_etf_cache()
-    app.run(debug=True)
+    warm_up()
+    if not DEBUG or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_refresh()
+    app.run(debug=DEBUG)
 
 
 
@@ -0,0 +1,31 @@
+﻿# -*- coding: utf-8 -*-
+"""Gunicorn settings for ``wsgi:application``.
+
+Every value can be overridden through the FINANCE_* environment variables
+below. ``kill -HUP <master>`` restarts workers gracefully; because the app is
+preloaded, deploy new code with ``USR2`` followed by ``WINCH``/``QUIT`` on the
+old master.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('FINANCE_BIND', '127.0.0.1:8000')
+workers = int(os.environ.get('FINANCE_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('FINANCE_THREADS', 4))
+worker_class = 'gthread'
+preload_app = True
+timeout = int(os.environ.get('FINANCE_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('FINANCE_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+max_requests = int(os.environ.get('FINANCE_MAX_REQUESTS', 5000))
+max_requests_jitter = max_requests // 10
+accesslog = '-'
+
+
+def post_fork(server, worker):
+    import finance_web
+
+    # finance_web resets its locks and provider sessions in the child on its
+    # own; every worker runs a refresher loop, but only the one holding
+    # data/etf_refresher.lock polls the providers.
+    finance_web.start_background_refresh()
@@ -0,0 +1,278 @@
+﻿# -*- coding: utf-8 -*-
+"""Vectorized Monte Carlo simulation of ETF portfolios.
+
+Paths are simulated in chunks. Each chunk gets its own child of one
+``SeedSequence``, so a given seed produces the same numbers whether the
+chunks run inline or on the process pool. ``run_simulation`` yields cumulative
+summaries as chunks finish and stops at its time budget.
+
+Percentile bands are read from per-step histograms of log portfolio value.
+Chunks add their counts into one histogram, so a band is a percentile of every
+simulated path rather than an average of per-chunk percentiles, and the result
+does not depend on the order chunks finish in.
+"""
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+
+import numpy as np
+
+METHODS = ('bootstrap', 'normal')
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+CHUNK_MAX_PATHS = 25_000
+CHUNK_MAX_CELLS = 2_000_000
+POOL_MIN_PATHS = 200_000
+POOL_WORKERS = max(1, min(4, os.cpu_count() or 1))
+STREAM_INTERVAL_SECONDS = 0.5
+BAND_BINS = 1024
+BAND_SIGMAS = 6.0
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def _pool():
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ProcessPoolExecutor(
+                max_workers=POOL_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _POOL
+
+
+def shutdown_pool():
+    global _POOL
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+atexit.register(shutdown_pool)
+
+
+def _discard_pool(pool):
+    # A pool that lost a process stays broken; drop it so the next run starts
+    # a fresh one, unless another run has already replaced it.
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is pool:
+            _POOL = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def band_edges(log_returns, weights, horizon):
+    """Log-value range each step's histogram covers, as ``(low, high)`` arrays.
+
+    The range is the historical portfolio drift plus or minus ``BAND_SIGMAS``
+    standard deviations scaled by the square root of time; the rare paths
+    outside it are counted in the under- and overflow bins.
+    """
+    daily = np.log1p(np.expm1(log_returns) @ weights)
+    steps = np.arange(1, horizon + 1)
+    spread = BAND_SIGMAS * max(float(daily.std()), 1e-9) * np.sqrt(steps)
+    center = float(daily.mean()) * steps
+    return center - spread, center + spread
+
+
+def _band_counts(values, edges):
+    low, high = edges
+    horizon = values.shape[1]
+    with np.errstate(divide='ignore'):
+        scaled = (np.log(values) - low) / (high - low) * BAND_BINS
+    bins = np.clip(np.floor(scaled), -1, BAND_BINS).astype(np.int64) + 1
+    offsets = np.arange(horizon) * (BAND_BINS + 2)
+    counts = np.bincount((bins + offsets).ravel(), minlength=horizon * (BAND_BINS + 2))
+    return counts.reshape(horizon, BAND_BINS + 2)
+
+
+def band_percentiles(counts, edges, percentiles):
+    """Interpolate percentiles per step from histogram counts; shape ``(len(percentiles), horizon)``."""
+    low, high = edges
+    steps = np.arange(len(counts))
+    total = counts[0].sum()
+    cumulative = np.cumsum(counts, axis=1)
+    width = (high - low) / BAND_BINS
+    bands = np.empty((len(percentiles), len(counts)))
+    for row, percentile in enumerate(percentiles):
+        target = min(percentile / 100 * total, total - 0.5)
+        index = np.argmax(cumulative > target, axis=1)
+        in_bin = counts[steps, index]
+        fraction = (target - (cumulative[steps, index] - in_bin)) / in_bin
+        position = np.clip(index - 1 + fraction, 0, BAND_BINS)
+        bands[row] = np.exp(low + position * width)
+    return bands
+
+
+def simulate_chunk(log_returns, weights, horizon, paths, method, seed, edges, deadline=None):
+    # Chunks already handed to a pool process cannot be cancelled; they skip
+    # their work instead once the request's budget is spent.
+    if deadline is not None and time.time() >= deadline:
+        return None
+    rng = np.random.default_rng(seed)
+    if method == 'bootstrap':
+        daily = np.expm1(log_returns) @ weights
+        portfolio = daily[rng.integers(0, len(daily), size=(paths, horizon))]
+    else:
+        mean = log_returns.mean(axis=0)
+        cov = np.atleast_2d(np.cov(log_returns, rowvar=False))
+        draws = rng.multivariate_normal(mean, cov, size=(paths, horizon))
+        portfolio = np.expm1(draws) @ weights
+
+    values = np.cumprod(1 + portfolio, axis=1)
+    peaks = np.maximum.accumulate(np.maximum(values, 1.0), axis=1)
+    return {
+        'paths': paths,
+        'band_counts': _band_counts(values, edges),
+        'terminal': values[:, -1],
+        'max_drawdown': (values / peaks).min(axis=1) - 1,
+    }
+
+
+class _Accumulator:
+    def __init__(self, seed, percentiles, confidence, edges):
+        self.seed = seed
+        self.percentiles = percentiles
+        self.confidence = confidence
+        self.edges = edges
+        self.band_counts = np.zeros((len(edges[0]), BAND_BINS + 2), dtype=np.int64)
+        self.chunks = {}
+
+    @property
+    def paths(self):
+        return sum(chunk['paths'] for chunk in self.chunks.values())
+
+    def add(self, index, chunk):
+        if chunk is None:
+            return
+        self.band_counts += chunk.pop('band_counts')
+        self.chunks[index] = chunk
+
+    def summary(self, requested_paths, complete):
+        chunks = [self.chunks[index] for index in sorted(self.chunks)]
+        paths = self.paths
+        if not paths:
+            return {'seed': self.seed, 'paths': 0, 'requested_paths': requested_paths, 'complete': complete}
+
+        bands = band_percentiles(self.band_counts, self.edges, self.percentiles)
+        returns = np.concatenate([chunk['terminal'] for chunk in chunks]) - 1
+        drawdowns = np.concatenate([chunk['max_drawdown'] for chunk in chunks])
+        var_level = np.percentile(returns, (1 - self.confidence) * 100)
+        return {
+            'seed': self.seed,
+            'paths': paths,
+            'requested_paths': requested_paths,
+            'complete': complete,
+            'bands': {
+                f'p{percentile:g}': np.round(bands[row], 6).tolist()
+                for row, percentile in enumerate(self.percentiles)
+            },
+            'terminal_return': {
+                'mean': round(float(returns.mean()), 6),
+                'median': round(float(np.median(returns)), 6),
+                'best': round(float(returns.max()), 6),
+                'worst': round(float(returns.min()), 6),
+                'probability_of_loss': round(float((returns < 0).mean()), 6),
+            },
+            'tail': {
+                'confidence': self.confidence,
+                'value_at_risk': round(float(-var_level), 6),
+                'expected_shortfall': round(float(-returns[returns <= var_level].mean()), 6),
+            },
+            'max_drawdown': {
+                'median': round(float(np.median(drawdowns)), 6),
+                'worst_5pct': round(float(np.percentile(drawdowns, 5)), 6),
+            },
+        }
+
+
+def _chunk_sizes(paths, cells_per_path):
+    size = max(1, min(CHUNK_MAX_PATHS, CHUNK_MAX_CELLS // max(1, cells_per_path)))
+    full, rest = divmod(paths, size)
+    return [size] * full + ([rest] if rest else [])
+
+
+def run_simulation(log_returns, weights, horizon, paths, method='bootstrap', seed=None,
+                   percentiles=DEFAULT_PERCENTILES, confidence=0.95, time_budget=None):
+    """Yield cumulative summary dicts; the last one has ``complete`` or ``truncated`` set."""
+    if method not in METHODS:
+        raise ValueError(f'Unknown simulation method: {method!r}')
+    log_returns = np.asarray(log_returns, dtype=np.float64)
+    weights = np.asarray(weights, dtype=np.float64)
+    deadline = time.monotonic() + time_budget if time_budget else None
+    if seed is None:
+        seed = int(np.random.SeedSequence().generate_state(1)[0])
+
+    cells_per_path = horizon * (1 if method == 'bootstrap' else len(weights))
+    sizes = _chunk_sizes(paths, cells_per_path)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    edges = band_edges(log_returns, weights, horizon)
+    wall_deadline = time.time() + time_budget if time_budget else None
+    tasks = [
+        (log_returns, weights, horizon, size, method, chunk_seed, edges, wall_deadline)
+        for size, chunk_seed in zip(sizes, seeds)
+    ]
+    accumulator = _Accumulator(seed, percentiles, confidence, edges)
+    last_yield = time.monotonic()
+
+    def due():
+        return time.monotonic() - last_yield >= STREAM_INTERVAL_SECONDS
+
+    def expired():
+        return deadline is not None and time.monotonic() >= deadline
+
+    pooled = paths >= POOL_MIN_PATHS and POOL_WORKERS >= 2
+    if pooled:
+        pool = _pool()
+        pending = {}
+        queued = iter(enumerate(tasks))
+        try:
+            for index, task in queued:
+                pending[pool.submit(simulate_chunk, *task)] = index
+                if len(pending) >= POOL_WORKERS * 2:
+                    break
+            while pending:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    accumulator.add(pending.pop(future), future.result())
+                if expired():
+                    break
+                for index, task in queued:
+                    pending[pool.submit(simulate_chunk, *task)] = index
+                    if len(pending) >= POOL_WORKERS * 2:
+                        break
+                if pending and due():
+                    yield accumulator.summary(paths, complete=False)
+                    last_yield = time.monotonic()
+        except BrokenProcessPool:
+            _discard_pool(pool)
+            pooled = False
+        finally:
+            # Also runs when a streaming client goes away mid-simulation.
+            for future in pending:
+                future.cancel()
+
+    if not pooled:
+        # Inline, or the rest of a pooled run whose pool broke: chunk seeds are
+        # fixed up front, so the result is the same either way.
+        for index, task in enumerate(tasks):
+            if index in accumulator.chunks:
+                continue
+            if expired():
+                break
+            accumulator.add(index, simulate_chunk(*task))
+            if index + 1 < len(tasks) and due():
+                yield accumulator.summary(paths, complete=False)
+                last_yield = time.monotonic()
+
+    complete = len(accumulator.chunks) == len(tasks)
+    summary = accumulator.summary(paths, complete=complete)
+    summary['truncated'] = not complete
+    yield summary
@@ -0,0 +1,64 @@
+﻿# -*- coding: utf-8 -*-
+"""Minified, content-fingerprinted CSS/JS bundles for the page templates."""
+from pathlib import Path
+import hashlib
+import re
+
+ASSET_SOURCE_DIR = Path(__file__).resolve().parent / 'assets'
+FINGERPRINT_LENGTH = 12
+
+_CSS_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+_CSS_WHITESPACE = re.compile(r'\s+')
+_CSS_PUNCTUATION = re.compile(r'\s*([{};,>])\s*')
+_CSS_COLON = re.compile(r':\s+')
+_JS_LINE_COMMENT = re.compile(r'^\s*//.*$', re.M)
+
+
+def minify_css(source: str) -> str:
+    css = _CSS_COMMENT.sub('', source)
+    css = _CSS_WHITESPACE.sub(' ', css)
+    css = _CSS_PUNCTUATION.sub(r'\1', css)
+    css = _CSS_COLON.sub(':', css)
+    return css.replace(';}', '}').strip()
+
+
+def minify_js(source: str) -> str:
+    # Line-level only: strings, template literals and regexes are left untouched.
+    js = _JS_LINE_COMMENT.sub('', source)
+    return '\n'.join(line.strip() for line in js.splitlines() if line.strip())
+
+
+MINIFIERS = {
+    '.css': (minify_css, 'text/css'),
+    '.js': (minify_js, 'text/javascript'),
+}
+
+
+class Asset:
+    __slots__ = ('name', 'filename', 'mimetype', 'content')
+
+    def __init__(self, name: str, content: bytes, mimetype: str):
+        self.name = name
+        self.content = content
+        self.mimetype = mimetype
+        stem, _, suffix = name.rpartition('.')
+        digest = hashlib.sha1(content).hexdigest()[:FINGERPRINT_LENGTH]
+        self.filename = f'{stem}.{digest}.{suffix}'
+
+
+def _source_paths(source_dir):
+    return [path for path in sorted(Path(source_dir).iterdir()) if path.suffix in MINIFIERS]
+
+
+def source_mtime(source_dir=ASSET_SOURCE_DIR):
+    """Newest modification time among the asset sources, 0.0 when there are none."""
+    return max((path.stat().st_mtime for path in _source_paths(source_dir)), default=0.0)
+
+
+def load_assets(source_dir=ASSET_SOURCE_DIR):
+    assets = {}
+    for path in _source_paths(source_dir):
+        minify, mimetype = MINIFIERS[path.suffix]
+        content = minify(path.read_text(encoding='utf-8')).encode('utf-8')
+        assets[path.name] = Asset(path.name, content, mimetype)
+    return assets
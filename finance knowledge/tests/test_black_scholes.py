@@ -0,0 +1,60 @@
+﻿# -*- coding: utf-8 -*-
+import numpy as np
+
+import black_scholes
+
+SPOT = 100.0
+STRIKES = np.array([70.0, 90.0, 100.0, 110.0, 140.0])
+EXPIRY = 0.75
+RATE = 0.03
+DIVIDEND = 0.01
+
+
+def test_put_call_parity():
+    vols = np.array([[0.1], [0.3], [0.8]])
+    call = black_scholes.black_scholes(SPOT, STRIKES, EXPIRY, vols, RATE, DIVIDEND, is_call=True)
+    put = black_scholes.black_scholes(SPOT, STRIKES, EXPIRY, vols, RATE, DIVIDEND, is_call=False)
+
+    forward_gap = SPOT * np.exp(-DIVIDEND * EXPIRY) - STRIKES * np.exp(-RATE * EXPIRY)
+    np.testing.assert_allclose(call['price'] - put['price'], np.broadcast_to(forward_gap, call['price'].shape),
+                               atol=1e-10)
+    np.testing.assert_allclose(call['delta'] - put['delta'], np.exp(-DIVIDEND * EXPIRY), atol=1e-12)
+    np.testing.assert_allclose(call['gamma'], put['gamma'])
+    np.testing.assert_allclose(call['vega'], put['vega'])
+
+
+def test_implied_volatility_round_trip():
+    vols = np.array([[0.15], [0.3], [0.6], [2.5]])
+    is_call = np.array([True, False, True, False, True])
+    prices = black_scholes.black_scholes(SPOT, STRIKES, EXPIRY, vols, RATE, DIVIDEND, is_call)['price']
+
+    implied, iterations = black_scholes.implied_volatility(prices, SPOT, STRIKES, EXPIRY, RATE, DIVIDEND, is_call)
+    np.testing.assert_allclose(implied, np.broadcast_to(vols, implied.shape), rtol=1e-6)
+    assert iterations < black_scholes.IV_MAX_ITERATIONS
+
+
+def test_price_above_the_volatility_ceiling_is_nan():
+    ceiling = black_scholes.black_scholes(SPOT, 100.0, EXPIRY, black_scholes.IV_UPPER_BOUND, RATE, DIVIDEND)['price']
+    upper = SPOT * np.exp(-DIVIDEND * EXPIRY)
+    assert ceiling < upper
+
+    implied, _ = black_scholes.implied_volatility(
+        [0.5 * (ceiling + upper), 0.99 * ceiling], SPOT, 100.0, EXPIRY, RATE, DIVIDEND
+    )
+    assert np.isnan(implied[0])
+    assert 0 < implied[1] < black_scholes.IV_UPPER_BOUND
+
+
+def test_prices_on_or_outside_the_arbitrage_bounds_are_nan():
+    spot_discount = SPOT * np.exp(-DIVIDEND * EXPIRY)
+    strike_discount = 90.0 * np.exp(-RATE * EXPIRY)
+    intrinsic = spot_discount - strike_discount
+    call_prices = [intrinsic, intrinsic - 0.01, spot_discount, spot_discount + 1.0]
+    put_prices = [0.0, strike_discount, strike_discount + 1.0]
+
+    calls, _ = black_scholes.implied_volatility(call_prices, SPOT, 90.0, EXPIRY, RATE, DIVIDEND, is_call=True)
+    puts, _ = black_scholes.implied_volatility(put_prices, SPOT, 90.0, EXPIRY, RATE, DIVIDEND, is_call=False)
+    expired, _ = black_scholes.implied_volatility(15.0, SPOT, 90.0, 0.0, RATE, DIVIDEND)
+    assert np.isnan(calls).all()
+    assert np.isnan(puts).all()
+    assert np.isnan(expired)
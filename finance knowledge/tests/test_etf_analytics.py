@@ -0,0 +1,55 @@
+﻿# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from etf_analytics import TRADING_DAYS, capm_regression, historical_var, parametric_var
+
+
+@pytest.fixture
+def returns():
+    rng = np.random.default_rng(5)
+    market = rng.normal(0.0004, 0.012, 300)
+    asset = 0.0002 + 1.3 * market + rng.normal(0.0, 0.006, 300)
+    return asset, market
+
+
+def test_capm_beta_matches_polyfit(returns):
+    asset, market = returns
+    rate = 0.02
+    excess = rate / TRADING_DAYS
+    slope, intercept = np.polyfit(market - excess, asset - excess, 1)
+
+    full = capm_regression(asset, market, risk_free_rate=rate)
+    np.testing.assert_allclose(full['beta'][0], slope, rtol=1e-10)
+    np.testing.assert_allclose(full['alpha'][0], intercept * TRADING_DAYS, rtol=1e-8)
+    np.testing.assert_allclose(full['r_squared'][0], np.corrcoef(market, asset)[0, 1] ** 2, rtol=1e-10)
+
+
+def test_rolling_capm_matches_polyfit_per_window(returns):
+    asset, market = returns
+    window = 60
+    rolling = capm_regression(asset, market, window)
+
+    assert len(rolling['beta']) == len(asset) - window + 1
+    for start in (0, 17, len(asset) - window):
+        slope, intercept = np.polyfit(market[start:start + window], asset[start:start + window], 1)
+        np.testing.assert_allclose(rolling['beta'][start], slope, rtol=1e-9)
+        np.testing.assert_allclose(rolling['alpha'][start], intercept * TRADING_DAYS, rtol=1e-7)
+
+
+def test_historical_var_matches_hand_computed_tail():
+    # 40 daily returns: the 95% tail is the 2 worst, the 99% tail the worst one.
+    returns = np.full(40, 0.01)
+    returns[[3, 11, 25, 31]] = [-0.05, -0.02, -0.03, -0.01]
+
+    var, cvar = historical_var(returns, (0.95, 0.99))
+    np.testing.assert_allclose(var[:, 0], [0.03, 0.05])
+    np.testing.assert_allclose(cvar[:, 0], [0.04, 0.05])
+
+
+def test_parametric_var_matches_normal_quantiles():
+    # mu = 0.1%, sigma = 2%: VaR = z * sigma - mu, CVaR = pdf(z) / (1 - c) * sigma - mu.
+    var, cvar = parametric_var(np.array([0.001]), np.array([[0.0004]]), np.array([1.0]), (0.95, 0.99))
+    np.testing.assert_allclose(var[:, 0], [1.6448536 * 0.02 - 0.001, 2.3263479 * 0.02 - 0.001], rtol=1e-6)
+    np.testing.assert_allclose(cvar[:, 0], [0.1031356 / 0.05 * 0.02 - 0.001, 0.0266521 / 0.01 * 0.02 - 0.001],
+                               rtol=1e-5)
@@ -0,0 +1,148 @@
+﻿# -*- coding: utf-8 -*-
+from datetime import date
+
+import numpy as np
+import pytest
+
+from etf_series import EtfSeries
+from etf_store import NpyStore, SharedSeriesCache
+
+START = date(2025, 1, 1).toordinal()
+
+
+def _series(offsets, navs):
+    return EtfSeries.from_navs([START + offset for offset in offsets], navs)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = NpyStore(tmp_path / 'etf_npy', compact_min_log_rows=5)
+    store.save({'510300': _series(range(10), np.linspace(1.0, 1.9, 10))})
+    return store
+
+
+def test_append_delta_reads_only_the_tail(store, monkeypatch):
+    def full_load(*args, **kwargs):
+        raise AssertionError('a delta append must not load the full history')
+
+    monkeypatch.setattr(store, 'load_rows', full_load)
+    store.append({'510300': _series([10, 11], [2.0, 2.1])})
+    monkeypatch.undo()
+
+    series = store.load_ticker('510300')
+    assert len(series) == 12
+    assert series.navs[-2:].tolist() == [2.0, 2.1]
+    assert store._log_path('510300').exists()
+
+
+def test_append_keeps_first_write_and_backfills_gaps(store):
+    store.save({'510300': _series([0, 1, 3], [1.0, 1.1, 1.3])})
+    store.append({'510300': _series([1, 2, 4], [9.9, 1.2, 1.4])})
+
+    series = store.load_ticker('510300')
+    assert (series.days - START).tolist() == [0, 1, 2, 3, 4]
+    assert series.navs.tolist() == [1.0, 1.1, 1.2, 1.3, 1.4]
+
+
+def test_append_compacts_once_the_log_reaches_the_threshold(store):
+    store.append({'510300': _series([10, 11, 12], [2.0, 2.1, 2.2])})
+    assert store._log_path('510300').exists()
+
+    store.append({'510300': _series([13, 14], [2.3, 2.4])})
+    assert not store._log_path('510300').exists()
+
+    base = store.load_array('510300', mmap=False)
+    assert len(base) == 15
+    assert store.load_ticker('510300') == _series(range(15), np.round(np.linspace(1.0, 2.4, 15), 4))
+
+
+def test_compact_round_trip_preserves_rows(store):
+    store.append({'510300': _series([10], [2.0]), '510500': _series([0, 1], [1.0, 1.1])})
+    before = store.load()
+
+    assert store.compact(min_log_rows=1) == 2
+    assert not store._log_path('510300').exists()
+    assert store.load().keys() == before.keys()
+    for ticker, series in before.items():
+        assert store.load_ticker(ticker) == series
+    assert sorted(store.tickers()) == ['510300', '510500']
+
+
+def test_load_rows_returns_copies(store):
+    rows = store.load_rows('510300')
+    assert not isinstance(rows, np.memmap)
+    assert rows.base is None or not isinstance(rows.base, np.memmap)
+
+
+def test_series_tail_rebases_returns():
+    series = _series(range(5), [1.0, 2.0, 2.5, 5.0, 4.0])
+    window = series.tail(3)
+    assert (window.days - START).tolist() == [2, 3, 4]
+    assert window.returns.tolist() == [0.0, 100.0, 60.0]
+    assert series.tail(10) == series
+
+
+def test_series_merge_prefers_existing_points():
+    merged = _series([0, 1, 2], [1.0, 1.1, 1.2]).merge(_series([2, 3], [9.9, 1.3]))
+    assert merged.navs.tolist() == [1.0, 1.1, 1.2, 1.3]
+    assert merged == _series(range(4), [1.0, 1.1, 1.2, 1.3])
+
+
+def test_series_merge_accepts_provider_points():
+    points = [{'date': date.fromordinal(START + 3).isoformat(), 'nav': 1.3, 'return_pct': 0.0}]
+    merged = _series([0, 1, 2], [1.0, 1.1, 1.2]).merge(points)
+    assert merged == _series(range(4), [1.0, 1.1, 1.2, 1.3])
+
+
+def test_shared_cache_round_trip_and_generation_bump(tmp_path):
+    writer = SharedSeriesCache(tmp_path / 'etf_shared')
+    reader = SharedSeriesCache(tmp_path / 'etf_shared')
+    first = {'510300': _series(range(3), [1.0, 1.1, 1.2]), '510500': _series([0, 2], [2.0, 1.9])}
+
+    published = writer.publish(first, 123.5, fallback=['510500'])
+    assert published.generation == reader.generation() == 1
+    snapshot = reader.load()
+    assert snapshot.mtime == 123.5
+    assert snapshot.cache == first
+    assert snapshot.fallback == {'510500'}
+
+    writer.publish({'510300': _series(range(4), [1.0, 1.1, 1.2, 1.3])}, 124.0)
+    assert reader.generation() == 2
+    assert list(reader.load().cache) == ['510300']
+    assert not reader.load().fallback
+    assert reader.load(1).cache == first
+
+
+def test_shared_cache_removes_stale_generations(tmp_path):
+    shared = SharedSeriesCache(tmp_path / 'etf_shared')
+    for generation in range(1, 5):
+        shared.publish({'510300': _series([0], [1.0 + generation])}, float(generation))
+
+    assert sorted(path.name for path in tmp_path.glob('etf_shared.*.bin')) == ['etf_shared.3.bin', 'etf_shared.4.bin']
+    assert shared.load(2) is None
+    assert shared.load(3).mtime == 3.0
+
+
+def test_shared_cache_skips_empty_series(tmp_path):
+    shared = SharedSeriesCache(tmp_path / 'etf_shared')
+    snapshot = shared.publish({'510300': EtfSeries.empty()}, 1.0, fallback=['510300'])
+    assert snapshot.cache == {} and not snapshot.fallback
+
+
+def test_shared_cache_missing_directory(tmp_path):
+    shared = SharedSeriesCache(tmp_path / 'missing' / 'etf_shared')
+    assert shared.generation() == 0
+    assert shared.load() is None
+
+    assert shared.publish({'510300': _series([0], [1.0])}, 1.0).generation == 1
+    assert shared.generation() == 1
+
+
+def test_shared_cache_unwritable_directory_raises_oserror(tmp_path):
+    blocker = tmp_path / 'not_a_dir'
+    blocker.write_bytes(b'')
+    shared = SharedSeriesCache(blocker / 'etf_shared')
+
+    with pytest.raises(OSError):
+        shared.publish({'510300': _series([0], [1.0])}, 1.0)
+    assert shared.generation() == 0
@@ -0,0 +1,341 @@
+﻿# -*- coding: utf-8 -*-
+import asyncio
+import gzip
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+from pathlib import Path
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+import requests
+from werkzeug.http import http_date
+
+import finance_web
+from etf_series import EtfSeries
+from etf_store import NpyStore, SharedSeriesCache
+from static_assets import source_mtime
+
+START = date(2025, 1, 1).toordinal()
+
+
+@pytest.fixture
+def client():
+    return finance_web.app.test_client()
+
+
+@pytest.mark.parametrize('model', [model for model in finance_web.MODELS if model.get('slug')],
+                         ids=lambda model: model['slug'])
+def test_every_model_slug_serves_its_card(client, model):
+    response = client.get(f"/api/models/{model['slug']}")
+    assert response.status_code == 200
+    assert response.get_json() == model
+
+
+def test_risk_model_aligns_only_the_requested_tickers(monkeypatch):
+    rng = np.random.default_rng(3)
+    cache = {
+        ticker: EtfSeries.from_navs(range(START + offset, START + 200), np.cumprod(1 + rng.normal(0, 0.01, 200 - offset)))
+        for ticker, offset in (('510300', 0), ('510500', 0), ('159915', 190))
+    }
+    monkeypatch.setattr(finance_web, 'ETF_STATE', finance_web._CacheState(cache, 0, 0, {}))
+
+    model = finance_web._risk_model(['510500', '510300'], 1)
+    assert model.tickers == ['510300', '510500']
+    assert len(model.days) == 199
+    assert finance_web._risk_model(['159915', '510300'], 20) is None
+
+
+def _yahoo_closes(count):
+    return finance_web._YahooCloses(
+        {'date': date.fromordinal(START + offset).isoformat(), 'nav': 1 + offset / 100, 'return_pct': float(offset)}
+        for offset in range(count)
+    )
+
+
+@pytest.fixture
+def isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(finance_web, 'ETF_STORE', NpyStore(tmp_path / 'etf_npy'))
+    monkeypatch.setattr(finance_web, 'SHARED_CACHE', SharedSeriesCache(tmp_path / 'etf_shared'))
+    monkeypatch.setattr(finance_web, 'ETF_STATE', finance_web._CacheState({}, 0, 0, {}))
+    return tmp_path
+
+
+ADOPT_IN_FRESH_PROCESS = """
+import json, sys
+import finance_web
+from etf_store import NpyStore, SharedSeriesCache
+finance_web.ETF_STORE = NpyStore(sys.argv[1] + '/etf_npy')
+finance_web.SHARED_CACHE = SharedSeriesCache(sys.argv[1] + '/etf_shared')
+finance_web._adopt_shared_cache()
+state = finance_web.ETF_STATE
+print(json.dumps({'fallback': sorted(state.fallback), 'since': finance_web._last_known_date('512170')}))
+"""
+
+
+def test_fallback_flag_survives_into_another_process(isolated_cache):
+    finance_web._merge_missing_series('512170', _yahoo_closes(5))
+    assert finance_web.ETF_STATE.fallback == {'512170'}
+    assert not finance_web.ETF_STORE.load_ticker('512170')
+
+    output = subprocess.run(
+        [sys.executable, '-c', ADOPT_IN_FRESH_PROCESS, str(isolated_cache)],
+        cwd=Path(finance_web.__file__).parent, capture_output=True, text=True, check=True,
+    ).stdout
+    assert json.loads(output) == {'fallback': ['512170'], 'since': None}
+
+
+def test_yahoo_closes_never_replace_stored_navs(isolated_cache):
+    navs = EtfSeries.from_navs(range(START, START + 3), [1.0, 1.1, 1.2])
+    finance_web.ETF_STORE.save({'512170': navs})
+
+    finance_web._merge_missing_series('512170', _yahoo_closes(5))
+    assert finance_web.ETF_STATE.cache['512170'] == navs
+    assert not finance_web.ETF_STATE.fallback
+
+
+def test_adopt_never_installs_an_older_generation(isolated_cache, monkeypatch):
+    navs = EtfSeries.from_navs(range(START, START + 3), [1.0, 1.1, 1.2])
+    shared = finance_web.SHARED_CACHE
+    shared.publish({'510300': navs}, 100.0)
+    finance_web._publish_cache({'510300': navs, '510500': navs}, 200.0)
+    assert finance_web.ETF_STATE.generation == 2
+
+    monkeypatch.setattr(shared, 'generation', lambda: 1)
+    assert not finance_web._adopt_shared_cache()
+    assert finance_web.ETF_STATE.generation == 2
+    assert set(finance_web.ETF_STATE.cache) == {'510300', '510500'}
+
+
+def test_store_reload_keeps_fallback_closes(isolated_cache):
+    finance_web.ETF_STORE.save({'510300': EtfSeries.from_navs(range(START, START + 3), [1.0, 1.1, 1.2])})
+    finance_web._merge_missing_series('512170', _yahoo_closes(5))
+    finance_web.ETF_STORE.append({'510300': EtfSeries.from_navs([START + 3], [1.3])})
+
+    finance_web._reload_cache_from_store()
+    state = finance_web.ETF_STATE
+    assert len(state.cache['510300']) == 4
+    assert state.fallback == {'512170'} and len(state.cache['512170']) == 5
+
+
+def test_async_ensure_adopts_new_generations_off_the_event_loop(isolated_cache, monkeypatch):
+    navs = EtfSeries.from_navs(range(START, START + 3), [1.0, 1.1, 1.2])
+    finance_web.SHARED_CACHE.publish({'510300': navs}, time.time())
+    adopted_in = []
+    adopt = finance_web._adopt_shared_cache
+
+    def tracking_adopt():
+        try:
+            asyncio.get_running_loop()
+            adopted_in.append('loop')
+        except RuntimeError:
+            adopted_in.append('thread')
+        return adopt()
+
+    monkeypatch.setattr(finance_web, '_adopt_shared_cache', tracking_adopt)
+    assert asyncio.run(finance_web.ensure_etf_cache_async())
+    assert adopted_in == ['thread']
+    assert finance_web.ETF_STATE.generation == 1
+
+    assert asyncio.run(finance_web.ensure_etf_cache_async())
+    assert adopted_in == ['thread']
+
+
+def test_page_last_modified_covers_asset_edits(client):
+    response = client.get('/')
+    assert response.last_modified.timestamp() >= int(source_mtime())
+
+    before_asset_edit = http_date(source_mtime() - 1)
+    assert client.get('/', headers={'If-Modified-Since': before_asset_edit}).status_code == 200
+
+
+class _StubProvider(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        server.seen.append({
+            'path': self.path,
+            'peer': self.client_address,
+            'referer': self.headers.get_all('Referer'),
+        })
+        if self.path.startswith('/flaky') and server.failures:
+            server.failures -= 1
+            status, body = 503, b'{}'
+        else:
+            status, body = 200, json.dumps({'path': self.path}).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_provider(monkeypatch):
+    monkeypatch.setattr(finance_web, 'PROVIDER_BACKOFF_SECONDS', 0.0)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _StubProvider)
+    server.seen = []
+    server.failures = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    client = finance_web._ProviderClient(
+        'stub', f'http://127.0.0.1:{server.server_port}', headers={'Referer': 'https://fund.eastmoney.com/'}
+    )
+    yield server, client
+    client.close()
+    server.shutdown()
+    server.server_close()
+
+
+def test_provider_client_reuses_one_keep_alive_connection(stub_provider):
+    server, client = stub_provider
+    session = client.session
+    for index in range(3):
+        assert client.get_json(f'/page{index}') == {'path': f'/page{index}'}
+    assert client.session is session
+
+    assert len({request['peer'] for request in server.seen}) == 1
+    assert all(request['referer'] == ['https://fund.eastmoney.com/'] for request in server.seen)
+
+
+def test_provider_client_retries_server_errors(stub_provider):
+    server, client = stub_provider
+    server.failures = finance_web.PROVIDER_RETRIES
+
+    assert client.get_json('/flaky') == {'path': '/flaky'}
+    assert len(server.seen) == finance_web.PROVIDER_RETRIES + 1
+
+    server.failures = finance_web.PROVIDER_RETRIES + 1
+    with pytest.raises(requests.HTTPError):
+        client.get_json('/flaky')
+
+
+@pytest.mark.parametrize('encoding', [None, 'gzip'])
+def test_if_none_match_is_per_encoding(client, encoding):
+    headers = {'Accept-Encoding': encoding} if encoding else {'Accept-Encoding': 'identity'}
+    identity = client.get('/api/models', headers={'Accept-Encoding': 'identity'})
+    response = client.get('/api/models', headers=headers)
+    etag = response.get_etag()[0]
+
+    assert response.status_code == 200
+    assert response.headers.get('Content-Encoding') == encoding
+    assert 'Accept-Encoding' in response.vary
+    if encoding:
+        assert etag == f'{identity.get_etag()[0]}-{encoding}'
+        assert gzip.decompress(response.get_data()) == identity.get_data()
+    else:
+        assert etag == identity.get_etag()[0]
+
+    revalidated = client.get('/api/models', headers={**headers, 'If-None-Match': f'"{etag}"'})
+    assert revalidated.status_code == 304
+    assert revalidated.get_etag()[0] == etag
+    assert revalidated.headers['Cache-Control'] == finance_web.CACHE_CONTROL_POLICIES['model_data']
+
+    other_etag = identity.get_etag()[0] if encoding else f'{etag}-gzip'
+    assert client.get('/api/models', headers={**headers, 'If-None-Match': f'"{other_etag}"'}).status_code == 200
+
+
+@pytest.mark.parametrize('path, endpoint', [
+    ('/', 'index'),
+    ('/api/cards', 'card_data'),
+    ('/api/models/capm', 'model_data'),
+    ('/models/capm', 'model_detail'),
+    (finance_web.ASSET_URLS['site.css'], 'static_asset'),
+])
+def test_cache_control_follows_the_endpoint_policy(client, path, endpoint):
+    response = client.get(path)
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == finance_web.CACHE_CONTROL_POLICIES[endpoint]
+
+
+def test_errors_carry_no_cache_policy(client):
+    response = client.get('/api/cards/no-such-card')
+    assert response.status_code == 404
+    assert 'Cache-Control' not in response.headers
+
+
+def test_static_build_is_incremental(tmp_path, monkeypatch):
+    monkeypatch.setattr(finance_web, 'ensure_etf_cache', lambda *args, **kwargs: False)
+    output = tmp_path / 'site'
+
+    written, unchanged, removed = finance_web.build_static_site(output)
+    assert written > 0 and unchanged == 0 and removed == 0
+    assert finance_web.build_static_site(output) == (0, written, 0)
+
+    slug, payload = next(iter(finance_web.CARD_DETAILS.items()))
+    page = output / 'cards' / slug / 'index.html'
+    other_pages = {
+        path: path.stat().st_mtime_ns for path in output.rglob('index.html') if path != page
+    }
+    monkeypatch.setitem(finance_web.CARD_DETAILS, slug, {**payload, 'card': {**payload['card'], 'title_en': 'Edited'}})
+    assert finance_web.build_static_site(output) == (1, written - 1, 0)
+    assert 'Edited' in page.read_text(encoding='utf-8')
+    assert all(path.stat().st_mtime_ns == mtime for path, mtime in other_pages.items())
+
+    dropped = '/api/cards'
+    monkeypatch.setattr(finance_web, 'CONTENT_RESPONSES', {
+        path: encoded for path, encoded in finance_web.CONTENT_RESPONSES.items() if path != dropped
+    })
+    assert finance_web.build_static_site(output) == (0, written - 1, 1)
+    assert not list(output.glob('api/cards.json*'))
+    assert dropped.strip('/') + '.json' not in json.loads(
+        (output / finance_web.STATIC_BUILD_MANIFEST_NAME).read_text(encoding='utf-8')
+    )
+
+
+def test_leader_compacts_store_logs_outside_trading_hours(isolated_cache, monkeypatch):
+    store = finance_web.ETF_STORE
+    store.save({'510300': EtfSeries.from_navs(range(START, START + 3), [1.0, 1.1, 1.2])})
+    store.append({'510300': EtfSeries.from_navs([START + 3], [1.3])})
+    assert store._log_path('510300').exists()
+    monkeypatch.setattr(finance_web, 'REFRESHER_LOCK_PATH', isolated_cache / 'etf_refresher.lock')
+    refresher = finance_web._BackgroundRefresher()
+
+    assert refresher._compact_store() == 0
+    assert refresher._lead()
+    try:
+        monkeypatch.setattr(finance_web, '_in_a_share_refresh_window', lambda *args: True)
+        assert refresher._compact_store() == 0
+        monkeypatch.setattr(finance_web, '_in_a_share_refresh_window', lambda *args: False)
+        assert refresher._compact_store() == 1
+    finally:
+        refresher._leader.release()
+
+    assert not store._log_path('510300').exists()
+    assert len(store.load_ticker('510300')) == 4
+
+
+def test_black_scholes_endpoints_live_under_analytics(client):
+    response = client.get('/api/analytics/black-scholes/price?spot=100&strike=100&expiry=1&vol=0.2')
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == finance_web.CACHE_CONTROL_POLICIES['option_prices']
+    np.testing.assert_allclose(response.get_json()['price'], [[[[7.965567]]]], atol=1e-6)
+
+    implied = client.post('/api/analytics/black-scholes/implied-vol', json={
+        'price': 7.965567, 'spot': 100, 'strike': 100, 'expiry': 1,
+    })
+    assert implied.status_code == 200
+    np.testing.assert_allclose(implied.get_json()['implied_vol'], 0.2, atol=1e-6)
+
+    assert client.get('/api/models/black-scholes/price?spot=100&strike=100&expiry=1&vol=0.2').status_code == 404
+
+
+def test_monte_carlo_endpoint_lives_under_analytics(isolated_cache, client):
+    rng = np.random.default_rng(9)
+    finance_web._install_cache({
+        '510300': EtfSeries.from_navs(range(START, START + 120), np.cumprod(1 + rng.normal(0, 0.01, 120))),
+    }, time.time())
+
+    response = client.get('/api/analytics/monte-carlo?tickers=510300&paths=500&horizon=5&seed=1')
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert payload['complete'] and payload['paths'] == 500 and len(payload['bands']['p50']) == 5
+    assert client.get('/api/models/monte-carlo/simulate?tickers=510300').status_code == 404
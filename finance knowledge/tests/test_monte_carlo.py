@@ -0,0 +1,73 @@
+﻿# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+import monte_carlo
+
+
+@pytest.fixture
+def log_returns():
+    return np.random.default_rng(0).normal(0.0003, 0.012, size=(500, 2))
+
+
+def _final(log_returns, **kwargs):
+    kwargs.setdefault('seed', 42)
+    return list(monte_carlo.run_simulation(log_returns, np.array([0.6, 0.4]), 21, 60_000, **kwargs))[-1]
+
+
+@pytest.mark.parametrize('method', monte_carlo.METHODS)
+def test_same_seed_reproduces_the_simulation(log_returns, method):
+    first = _final(log_returns, method=method)
+    assert first['complete'] and not first['truncated']
+    assert _final(log_returns, method=method) == first
+    assert _final(log_returns, method=method, seed=43)['bands'] != first['bands']
+
+
+def test_chunk_order_does_not_change_the_summary(log_returns, monkeypatch):
+    monkeypatch.setattr(monte_carlo, 'CHUNK_MAX_PATHS', 7_000)
+    expected = _final(log_returns)
+
+    original = monte_carlo._Accumulator.add
+    arrivals = []
+
+    def add_last_first(self, index, chunk):
+        arrivals.append((index, chunk))
+        if len(arrivals) == len(monte_carlo._chunk_sizes(60_000, 21)):
+            for late_index, late_chunk in reversed(arrivals):
+                original(self, late_index, late_chunk)
+
+    monkeypatch.setattr(monte_carlo._Accumulator, 'add', add_last_first)
+    assert _final(log_returns) == expected
+
+
+def test_bands_match_percentiles_of_all_paths():
+    values = np.exp(np.random.default_rng(1).normal(0.0, 0.05, size=(40_000, 3)).cumsum(axis=1))
+    edges = (np.full(3, -0.5), np.full(3, 0.5))
+    percentiles = (5, 50, 95)
+
+    bands = monte_carlo.band_percentiles(monte_carlo._band_counts(values, edges), edges, percentiles)
+    np.testing.assert_allclose(bands, np.percentile(values, percentiles, axis=0), rtol=1e-3)
+
+
+def test_expired_budget_reports_truncated(log_returns):
+    summary = _final(log_returns, time_budget=1e-9)
+    assert summary['truncated'] and not summary['complete']
+    assert summary['paths'] < summary['requested_paths']
+
+
+def test_broken_pool_is_replaced_and_the_run_finishes(log_returns, monkeypatch):
+    monkeypatch.setattr(monte_carlo, 'POOL_MIN_PATHS', 1)
+    monkeypatch.setattr(monte_carlo, 'POOL_WORKERS', 2)
+    expected = _final(log_returns)
+    pool = monte_carlo._POOL
+    try:
+        for process in list(pool._processes.values()):
+            process.kill()
+            process.join()
+
+        assert _final(log_returns) == expected
+        assert monte_carlo._POOL is not pool
+        assert _final(log_returns) == expected
+        assert monte_carlo._POOL is not None
+    finally:
+        monte_carlo.shutdown_pool()
@@ -0,0 +1,15 @@
+﻿# -*- coding: utf-8 -*-
+import os
+
+import static_assets
+
+
+def test_source_mtime_tracks_the_newest_asset(tmp_path):
+    assert static_assets.source_mtime(tmp_path) == 0.0
+    for name, mtime in (('site.css', 1_000), ('home.js', 2_000), ('notes.txt', 9_000)):
+        path = tmp_path / name
+        path.write_text('/* x */', encoding='utf-8')
+        os.utime(path, (mtime, mtime))
+
+    assert static_assets.source_mtime(tmp_path) == 2_000
+    assert sorted(static_assets.load_assets(tmp_path)) == ['home.js', 'site.css']
@@ -0,0 +1,19 @@
+﻿# -*- coding: utf-8 -*-
+"""Production entry point: ``gunicorn -c gunicorn.conf.py wsgi:application``.
+
+Importing this module warms the ETF and page caches once. With
+``preload_app`` that happens in the gunicorn master, so workers fork with
+the loaded data already in (copy-on-write) memory.
+"""
+import gc
+import os
+
+os.environ.setdefault('FINANCE_DEBUG', '0')
+
+from finance_web import DEBUG, app, warm_up
+
+app.debug = DEBUG
+warm_up()
+gc.freeze()
+
+application = app